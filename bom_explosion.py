@@ -0,0 +1,91 @@
+# bom_explosion.py (All-products FG × RAW requirements as one sparse matrix)
+
+import argparse
+
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+
+from bom_index import BomIndex
+from table_io import OUT_DIR
+
+BLOCK_ROWS = 1000  # top-level materials exploded together; bounds intermediate fill-in
+REQUIREMENTS_PATH = OUT_DIR / "bom_requirements.npz"
+
+
+def quantity_matrix(index):
+    """The BOM as a sparse material × material matrix: Q[parent, component] = Quantity."""
+    n = len(index)
+    return sp.csr_matrix((index.quantities, index.children, index.offsets), shape=(n, n))
+
+
+def top_level(index):
+    """Codes of materials that are no other material's component."""
+    return np.setdiff1d(np.arange(len(index)), index.children)
+
+
+def explode_all(index, tops=None, block_rows=BLOCK_ROWS):
+    """
+    RAW requirements per unit of every top-level material (or of `tops`).
+    For a block of rows X (one-hot on the tops), each step adds X @ Q[:, raw]
+    to the totals and moves on to X @ Q[:, sub-assemblies], so step k
+    accounts for every path of length k, so the loop runs once per BOM
+    level. Returns a Requirements matrix.
+    """
+    index.low_level_codes()  # raises on a cyclic BOM, which would never run out of paths
+    tops = top_level(index) if tops is None else np.asarray(tops)
+    q = quantity_matrix(index)
+    raw = np.flatnonzero(index.is_raw)
+    q_raw = q[:, raw]
+    q_sub = q @ sp.diags((~index.is_raw).astype(np.int64), dtype=np.int64)
+    q_sub.eliminate_zeros()
+
+    blocks = []
+    for start in range(0, len(tops), block_rows):
+        rows = tops[start:start + block_rows]
+        x = sp.csr_matrix((np.ones(len(rows), np.int64), (np.arange(len(rows)), rows)),
+                          shape=(len(rows), len(index)))
+        total = sp.csr_matrix((len(rows), len(raw)), dtype=np.int64)
+        while x.nnz:
+            total = total + x @ q_raw
+            x = x @ q_sub
+        blocks.append(total)
+    matrix = sp.vstack(blocks, format="csr") if blocks else sp.csr_matrix((0, len(raw)), dtype=np.int64)
+    return Requirements(matrix, index.materials[tops], index.materials[raw])
+
+
+class Requirements:
+    """Sparse requirements matrix with its row (product) and column (RAW) labels."""
+
+    def __init__(self, matrix, products, raws):
+        self.matrix = matrix.tocsr()
+        self.products = pd.Index(products, name="MaterialNumber")
+        self.raws = pd.Index(raws, name="RawMaterial")
+
+    def of(self, material_number):
+        """RAW quantities per unit of one product, as a Series indexed by RawMaterial."""
+        row = self.matrix[self.products.get_loc(material_number)]
+        return pd.Series(row.data, index=self.raws[row.indices], name="TotalQty").sort_index()
+
+    def save(self, path=REQUIREMENTS_PATH):
+        m = self.matrix
+        np.savez_compressed(path, data=m.data, indices=m.indices, indptr=m.indptr, shape=m.shape,
+                            products=self.products.to_numpy(str), raws=self.raws.to_numpy(str))
+        return path
+
+    @classmethod
+    def load(cls, path=REQUIREMENTS_PATH):
+        with np.load(path) as f:
+            matrix = sp.csr_matrix((f["data"], f["indices"], f["indptr"]), shape=tuple(f["shape"]))
+            return cls(matrix, f["products"], f["raws"])
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Explode every top-level material to RAW requirements.")
+    parser.add_argument("--block-rows", type=int, default=BLOCK_ROWS)
+    args = parser.parse_args()
+
+    req = explode_all(BomIndex.from_table(), block_rows=args.block_rows)
+    path = req.save()
+    print(f"✅ {path} written | products={len(req.products):,} | raws={len(req.raws):,} "
+          f"| nonzeros={req.matrix.nnz:,}")
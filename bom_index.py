@@ -0,0 +1,123 @@
+# bom_index.py
+
+import numpy as np
+import pandas as pd
+
+from table_io import read_table
+
+
+class BomIndex:
+    """
+    Parent → component adjacency, built once from the BOM table. Components
+    of material code k live in rows offsets[k]:offsets[k+1] of `children`
+    and `quantities`; the reverse (where-used) direction lives in
+    parent_offsets/parents/parent_quantities. Codes index `materials`,
+    which holds every parent and component number sorted.
+    """
+
+    def __init__(self, bom):
+        parents = bom["ParentMaterial"].astype(str).to_numpy()
+        components = bom["ComponentMaterial"].astype(str).to_numpy()
+        codes, materials = pd.factorize(np.concatenate([parents, components]), sort=True)
+        parent, child = codes[:len(parents)], codes[len(parents):]
+        qty = bom["Quantity"].to_numpy(dtype=np.int64)
+
+        self.materials = pd.Index(materials, name="MaterialNumber")
+        self.offsets, self.children, self.quantities = _csr(parent, child, qty, len(materials))
+        self.parent_offsets, self.parents, self.parent_quantities = _csr(child, parent, qty, len(materials))
+        self.is_raw = np.asarray(self.materials.str.startswith("RAW"))
+        self._llc = None
+
+    @classmethod
+    def from_table(cls):
+        """Load out/bom_table."""
+        return cls(read_table("bom_table", columns=["ParentMaterial", "ComponentMaterial", "Quantity"]))
+
+    def __len__(self):
+        return len(self.materials)
+
+    def codes(self, material_numbers):
+        """Integer codes for material numbers; -1 where a material is not in the BOM."""
+        return self.materials.get_indexer(material_numbers)
+
+    def low_level_codes(self):
+        """
+        Low-level code per material, computed once per index by
+        bom_validation; raises BomCycleError if the BOM has a cycle. Walks
+        below rely on this check to terminate.
+        """
+        if self._llc is None:
+            from bom_validation import low_level_codes
+            self._llc = low_level_codes(self)
+        return self._llc
+
+    def expand(self, codes, qty):
+        """
+        One level down from parallel (codes, qty) arrays: every component row
+        of every parent, as (component codes, qty × Quantity), with repeated
+        components summed.
+        """
+        rows, counts = row_slices(self.offsets, codes)
+        return sum_by_code(self.children[rows], np.repeat(qty, counts) * self.quantities[rows])
+
+    def explode(self, material_number, qty=1):
+        """
+        RAW requirements for `qty` of one material as (raw codes, total qty),
+        walking one whole level per step. Shared sub-assemblies reached at the
+        same depth are expanded once, so the cost follows the subtree size.
+        """
+        self.low_level_codes()
+        k = self.codes([material_number])[0]
+        codes = np.array([k] if k >= 0 else [], dtype=np.int64)
+        qty = np.full(len(codes), qty, dtype=np.int64)
+        raw_codes, raw_qty = [np.empty(0, np.int64)], [np.empty(0, np.int64)]
+        while len(codes):
+            codes, qty = self.expand(codes, qty)
+            raw = self.is_raw[codes]
+            raw_codes.append(codes[raw])
+            raw_qty.append(qty[raw])
+            codes, qty = codes[~raw], qty[~raw]
+        return sum_by_code(np.concatenate(raw_codes), np.concatenate(raw_qty))
+
+    def ancestors(self, codes):
+        """
+        Where-used for several materials at once, walking one level up per
+        step. Returns parallel arrays (source position in `codes`, ancestor
+        code, qty of the source per unit of the ancestor), with the quantity
+        summed over all paths and sorted by source then ancestor.
+        """
+        self.low_level_codes()
+        n = len(self.materials)
+        source, node = np.arange(len(codes)), np.asarray(codes, dtype=np.int64)
+        qty = np.ones(len(node), dtype=np.int64)
+        keys, totals = [np.empty(0, np.int64)], [np.empty(0, np.int64)]
+        while len(node):
+            rows, counts = row_slices(self.parent_offsets, node)
+            key = np.repeat(source, counts) * n + self.parents[rows]
+            key, qty = sum_by_code(key, np.repeat(qty, counts) * self.parent_quantities[rows])
+            keys.append(key)
+            totals.append(qty)
+            source, node = key // n, key % n
+        key, qty = sum_by_code(np.concatenate(keys), np.concatenate(totals))
+        return key // n, key % n, qty
+
+
+def _csr(src, dst, qty, n):
+    """Group (dst, qty) by src into offsets plus contiguous arrays."""
+    order = np.argsort(src, kind="stable")
+    offsets = np.zeros(n + 1, dtype=np.int64)
+    np.cumsum(np.bincount(src, minlength=n), out=offsets[1:])
+    return offsets, dst[order], qty[order]
+
+
+def row_slices(offsets, codes):
+    """Row positions of the slices offsets[k]:offsets[k+1] of all codes, and their lengths."""
+    start = offsets[codes]
+    counts = offsets[codes + 1] - start
+    return np.repeat(start - np.cumsum(counts) + counts, counts) + np.arange(counts.sum()), counts
+
+
+def sum_by_code(codes, qty):
+    """Sum qty per distinct code; returns (sorted codes, int64 totals)."""
+    uniq, inverse = np.unique(codes, return_inverse=True)
+    return uniq, np.bincount(inverse, weights=qty, minlength=len(uniq)).astype(np.int64)
@@ -1,38 +1,96 @@
 # bom_resolver.py
 
+from collections import OrderedDict
+
+import numpy as np
 import pandas as pd
 
-def load_bom(path="out/bom_table.csv"):
-    return pd.read_csv(path)
+from bom_index import BomIndex, sum_by_code
+from table_io import OUT_DIR, file_digest, read_table, read_table_at, resolve_table
+
+CACHE_SIZE = 10_000_000  # (raw, qty) pairs kept across memoized roll-ups, ~160 MB
+
+def load_bom(path=None, out_dir=OUT_DIR):
+    """BOM table from out_dir, or from the table named by `path` (e.g. "out/bom_table.csv")."""
+    return read_table("bom_table", out_dir=out_dir) if path is None else read_table_at(path)
 
-def resolve_to_raw(bom_df, material_number):
+def resolve_to_raw(bom, material_number):
     """
-    Resolve all RAWs under a given FG or SFG using recursive traversal.
+    Resolve all RAWs under a given FG or SFG through the BOM index.
+    `bom` is a BomIndex, or a BOM DataFrame to build one from (build the
+    index once when resolving many materials).
     Returns a flat list of raw components with cumulative quantities.
     """
-    from collections import defaultdict, deque
-    
-    resolved = defaultdict(int)
-    queue = deque([(material_number, 1)])
+    index = bom if isinstance(bom, BomIndex) else BomIndex(bom)
+    codes, qty = index.explode(material_number)
+    return pd.DataFrame({"RawMaterial": index.materials[codes].to_numpy(), "TotalQty": qty})
+
+class BomResolver:
+    """
+    Resolves materials against out/bom_table, memoizing each material's RAW
+    roll-up per unit so shared sub-assemblies are exploded once. Roll-ups
+    are kept in an LRU holding at most `maxsize` (raw, qty) pairs. Every lookup checks the table
+    file: when its path, mtime or size changed and its content hash differs,
+    the index is rebuilt, validated and the memo cleared.
+    """
 
-    while queue:
-        parent, parent_qty = queue.popleft()
-        children = bom_df[bom_df["ParentMaterial"] == parent]
+    def __init__(self, name="bom_table", maxsize=CACHE_SIZE):
+        self.name = name
+        self.maxsize = maxsize
+        self.index = None
+        self.hits = self.misses = 0
+        self._memo = OrderedDict()
+        self._memo_size = 0
+        self._stat = self._digest = None
 
-        for _, row in children.iterrows():
-            child = row["ComponentMaterial"]
-            qty = int(row["Quantity"])
-            total_qty = qty * parent_qty
+    def refresh(self):
+        """Reload the BOM if its file changed since the last lookup."""
+        path = resolve_table(self.name)
+        st = path.stat()
+        stat = (str(path), st.st_mtime_ns, st.st_size)
+        if stat == self._stat:
+            return
+        digest = file_digest(path)
+        if digest != self._digest:
+            index = BomIndex(read_table(self.name, columns=["ParentMaterial", "ComponentMaterial", "Quantity"]))
+            index.low_level_codes()  # validate before recursing through it
+            self.index = index
+            self._memo.clear()
+            self._memo_size = 0
+            self._digest = digest
+        self._stat = stat
 
-            if child.startswith("RAW"):
-                resolved[child] += total_qty
-            else:
-                queue.append((child, total_qty))
+    def _rollup(self, k):
+        """(raw codes, qty) per unit of material code k."""
+        if k in self._memo:
+            self.hits += 1
+            self._memo.move_to_end(k)
+            return self._memo[k]
+        self.misses += 1
+        rows = slice(self.index.offsets[k], self.index.offsets[k + 1])
+        children, qty = self.index.children[rows], self.index.quantities[rows]
+        raw = self.index.is_raw[children]
+        codes, totals = [children[raw]], [qty[raw]]
+        for child, child_qty in zip(children[~raw], qty[~raw]):
+            child_codes, child_totals = self._rollup(child)
+            codes.append(child_codes)
+            totals.append(child_totals * child_qty)
+        result = sum_by_code(np.concatenate(codes), np.concatenate(totals))
+        self._memo[k] = result
+        self._memo_size += len(result[0])
+        while self._memo_size > self.maxsize and len(self._memo) > 1:
+            self._memo_size -= len(self._memo.popitem(last=False)[1][0])
+        return result
 
-    return pd.DataFrame([{"RawMaterial": k, "TotalQty": v} for k, v in resolved.items()])
+    def resolve(self, material_number, qty=1):
+        """Same result as resolve_to_raw, for `qty` units of the material."""
+        self.refresh()
+        k = self.index.codes([material_number])[0]
+        codes, totals = self._rollup(k) if k >= 0 else (np.empty(0, np.int64), np.empty(0, np.int64))
+        return pd.DataFrame({"RawMaterial": self.index.materials[codes].to_numpy(), "TotalQty": totals * qty})
 
 if __name__ == "__main__":
-    bom_df = load_bom()
-    material_number = input("Enter FG or SFG material number (e.g. FG0001): ").strip()
-    result = resolve_to_raw(bom_df, material_number)
-    print(result)
+    resolver = BomResolver()
+    while material_number := input("Enter FG or SFG material number (e.g. FG0001, blank to quit): ").strip():
+        result = resolver.resolve(material_number)
+        print(result)
@@ -1,6 +1,5 @@
 # comprehensive_eda.py - Cross-Dataset Analysis & Relationships
 
-import pandas as pd
 import numpy as np
 import matplotlib.pyplot as plt
 import seaborn as sns
@@ -8,6 +7,9 @@ from matplotlib.dates import DateFormatter
 import warnings
 warnings.filterwarnings('ignore')
 
+from dataset_cache import load_dataset, load_features
+from routing_index import RoutingIndex
+
 # Configure plotting
 plt.style.use('seaborn-v0_8')
 sns.set_palette("husl")
@@ -21,12 +23,14 @@ print("="*80)
 print("\n📁 LOADING ALL DATASETS...")
 try:
     # Core datasets
-    material_master = pd.read_csv("out/material_master.csv")
-    bom_table = pd.read_csv("out/bom_table.csv")
-    routing_table = pd.read_csv("out/routing_table.csv")
-    production_orders = pd.read_csv("out/production_orders.csv", parse_dates=["OrderDate"])
-    nal = pd.read_csv("out/NAL.csv", parse_dates=["RecordDateTime"])
-    model_ready = pd.read_csv("out/model_ready.csv", parse_dates=["RecordDateTime"])
+    material_master = load_dataset("material_master")
+    bom_table = load_dataset("bom_table")
+    routing_table = load_dataset("routing_table")
+    production_orders = load_dataset("production_orders")
+    nal = load_dataset("NAL")
+    # Model-ready features with categorical columns kept, from its matrix export
+    model_ready = load_features()
+    routing_index = RoutingIndex(routing_table)
     
     print("✅ All datasets loaded successfully!")
     
@@ -56,7 +60,7 @@ print("="*80)
 print("\n1️⃣ MATERIAL MASTER HIERARCHY")
 print("-" * 40)
 material_counts = material_master['MaterialType'].value_counts()
-complexity_dist = material_master.groupby(['MaterialType', 'ProductComplexity']).size().unstack(fill_value=0)
+complexity_dist = material_master.groupby(['MaterialType', 'ProductComplexity'], observed=True).size().unstack(fill_value=0)
 
 fig, axes = plt.subplots(1, 2, figsize=(15, 6))
 
@@ -83,7 +87,7 @@ print("\n2️⃣ BILL OF MATERIALS (BOM) ANALYSIS")
 print("-" * 40)
 
 # BOM depth analysis
-bom_stats = bom_table.groupby('ParentMaterial').agg({
+bom_stats = bom_table.groupby('ParentMaterial', observed=True).agg({
     'ComponentMaterial': 'count',
     'Quantity': ['sum', 'mean']
 }).round(2)
@@ -95,7 +99,7 @@ print("🔧 Most Complex Products (by component count):")
 print(top_complex)
 
 # BOM level analysis
-level_analysis = bom_table.groupby('Level').agg({
+level_analysis = bom_table.groupby('Level', observed=True).agg({
     'ParentMaterial': 'nunique',
     'ComponentMaterial': 'nunique',
     'Quantity': ['sum', 'mean']
@@ -133,15 +137,16 @@ wc_material_matrix = routing_table.pivot_table(
     columns='MaterialNumber', 
     values='OperationSeq', 
     aggfunc='count', 
-    fill_value=0
+    fill_value=0,
+    observed=True
 )
 
 print(f"Work Centers: {routing_table['WorkCenter'].nunique()}")
-print(f"Materials with routings: {routing_table['MaterialNumber'].nunique()}")
+print(f"Materials with routings: {len(routing_index)}")
 print(f"Machine Classes: {routing_table['MachineClass'].nunique()}")
 
 # Work center load analysis
-wc_load = routing_table.groupby('WorkCenter').agg({
+wc_load = routing_table.groupby('WorkCenter', observed=True).agg({
     'MaterialNumber': 'nunique',
     'SetupTime_min': 'mean',
     'RunTime_min': 'mean'
@@ -153,7 +158,7 @@ print(f"\n🏭 Work Center Load (Top 10):")
 print(wc_load.head(10))
 
 # Machine class distribution
-machine_dist = routing_table.groupby('MachineClass').agg({
+machine_dist = routing_table.groupby('MachineClass', observed=True).agg({
     'WorkCenter': 'nunique',
     'MaterialNumber': 'nunique',
     'SetupTime_min': 'mean',
@@ -175,7 +180,7 @@ plt.ylabel('Average Run Time (min)')
 plt.title('Work Center Setup vs Run Time')
 
 plt.subplot(2, 2, 3)
-ops_per_material = routing_table.groupby('MaterialNumber').size()
+ops_per_material = routing_index.op_counts()
 plt.hist(ops_per_material, bins=15, alpha=0.7, edgecolor='black')
 plt.title('Operations per Material Distribution')
 plt.xlabel('Number of Operations')
@@ -183,7 +188,7 @@ plt.ylabel('Frequency')
 
 plt.subplot(2, 2, 4)
 # Heatmap of work center usage
-wc_usage = routing_table.groupby(['WorkCenter', 'MachineClass']).size().unstack(fill_value=0)
+wc_usage = routing_table.groupby(['WorkCenter', 'MachineClass'], observed=True).size().unstack(fill_value=0)
 sns.heatmap(wc_usage, annot=True, fmt='d', cmap='YlOrRd', cbar_kws={'label': 'Operations'})
 plt.title('Work Center × Machine Class Matrix')
 
@@ -195,7 +200,7 @@ print("\n4️⃣ PRODUCTION ORDERS ANALYSIS")
 print("-" * 40)
 
 # Order patterns
-order_analysis = production_orders.groupby('MaterialNumber').agg({
+order_analysis = production_orders.groupby('MaterialNumber', observed=True).agg({
     'ProductionOrderID': 'count',
     'PlannedQty': ['sum', 'mean'],
     'OrderDate': ['min', 'max']
@@ -208,7 +213,7 @@ print("📦 Most Frequently Ordered Materials:")
 print(top_ordered[['Order_Count', 'Total_Planned_Qty', 'Avg_Planned_Qty']])
 
 # Plant distribution
-plant_orders = production_orders.groupby('PlantID').agg({
+plant_orders = production_orders.groupby('PlantID', observed=True).agg({
     'ProductionOrderID': 'count',
     'PlannedQty': 'sum',
     'MaterialNumber': 'nunique'
@@ -244,7 +249,7 @@ plt.ylabel('Frequency')
 
 plt.subplot(2, 2, 4)
 complexity_orders = production_orders.merge(material_master[['MaterialNumber', 'ProductComplexity']], on='MaterialNumber')
-complexity_orders.groupby('ProductComplexity')['PlannedQty'].sum().plot(kind='bar', alpha=0.7)
+complexity_orders.groupby('ProductComplexity', observed=True)['PlannedQty'].sum().plot(kind='bar', alpha=0.7)
 plt.title('Total Planned Quantity by Complexity')
 plt.ylabel('Total Planned Quantity')
 plt.xticks(rotation=0)
@@ -257,12 +262,12 @@ print("\n5️⃣ CROSS-DATASET RELATIONSHIPS")
 print("-" * 40)
 
 # Material complexity vs operations
-material_operations = routing_table.groupby('MaterialNumber').size().reset_index(name='Operation_Count')
+material_operations = routing_index.op_counts().reset_index()
 material_complexity = material_master[['MaterialNumber', 'ProductComplexity']].copy()
 complexity_ops = material_complexity.merge(material_operations, on='MaterialNumber', how='left')
 complexity_ops['Operation_Count'] = complexity_ops['Operation_Count'].fillna(0)
 
-complexity_vs_ops = complexity_ops.groupby('ProductComplexity')['Operation_Count'].agg(['mean', 'std', 'count']).round(2)
+complexity_vs_ops = complexity_ops.groupby('ProductComplexity', observed=True)['Operation_Count'].agg(['mean', 'std', 'count']).round(2)
 print("🔧 Product Complexity vs Average Operations:")
 print(complexity_vs_ops)
 
@@ -273,7 +278,8 @@ plant_type_matrix = plant_materials.pivot_table(
     columns='MaterialType', 
     values='ProductionOrderID', 
     aggfunc='count', 
-    fill_value=0
+    fill_value=0,
+    observed=True
 )
 
 print(f"\n🏭 Plant × Material Type Matrix:")
@@ -290,7 +296,7 @@ print(f"Data Retention Rate: {len(model_ready)/len(nal)*100:.1f}%")
 
 # Performance metrics by work center
 if 'WorkCenterID' in model_ready.columns:
-    wc_performance = model_ready.groupby('WorkCenterID').agg({
+    wc_performance = model_ready.groupby('WorkCenterID', observed=True).agg({
         'SetupTime_Actual_min': 'mean',
         'RunTime_Actual_min': 'mean',
         'YieldRate_pct': 'mean',
@@ -302,14 +308,8 @@ if 'WorkCenterID' in model_ready.columns:
     print(wc_performance.sort_values('CapacityUtilization', ascending=False).head(10))
 
 # Material complexity impact on performance
-if 'ProductComplexity_LOW' in model_ready.columns and 'ProductComplexity_MED' in model_ready.columns:
-    # Derive complexity from one-hot encoding
-    model_ready_complexity = model_ready.copy()
-    model_ready_complexity['ProductComplexity'] = 'HIGH'  # Default
-    model_ready_complexity.loc[model_ready_complexity['ProductComplexity_LOW'] == True, 'ProductComplexity'] = 'LOW'
-    model_ready_complexity.loc[model_ready_complexity['ProductComplexity_MED'] == True, 'ProductComplexity'] = 'MED'
-    
-    complexity_performance = model_ready_complexity.groupby('ProductComplexity').agg({
+if 'ProductComplexity' in model_ready.columns:
+    complexity_performance = model_ready.groupby('ProductComplexity', observed=True).agg({
         'SetupTime_Actual_min': 'mean',
         'RunTime_Actual_min': 'mean',
         'YieldRate_pct': 'mean',
@@ -335,7 +335,7 @@ plt.title('Material Hierarchy')
 
 # BOM complexity heatmap
 plt.subplot(3, 4, 2)
-bom_level_qty = bom_table.pivot_table(index='Level', columns='ParentMaterial', values='Quantity', aggfunc='sum', fill_value=0)
+bom_level_qty = bom_table.pivot_table(index='Level', columns='ParentMaterial', values='Quantity', aggfunc='sum', fill_value=0, observed=True)
 # Take top 20 materials for visibility
 top_materials = bom_stats.nlargest(20, 'Component_Count').index
 bom_subset = bom_level_qty[bom_level_qty.columns.intersection(top_materials)]
@@ -345,21 +345,15 @@ plt.title('BOM Quantity by Level (Top Materials)')
 
 # Work center network
 plt.subplot(3, 4, 3)
-wc_material_count = routing_table.groupby('WorkCenter')['MaterialNumber'].nunique().sort_values(ascending=False)
+wc_material_count = routing_table.groupby('WorkCenter', observed=True)['MaterialNumber'].nunique().sort_values(ascending=False)
 wc_material_count.head(15).plot(kind='barh', alpha=0.7)
 plt.title('Materials per Work Center')
 plt.xlabel('Number of Materials')
 
 # Plant capacity distribution
 plt.subplot(3, 4, 4)
-if 'PlantID_PLT2' in model_ready.columns and 'PlantID_PLT3' in model_ready.columns:
-    # Derive plant from one-hot
-    model_ready_plants = model_ready.copy()
-    model_ready_plants['PlantID'] = 'PLT1'  # Default
-    model_ready_plants.loc[model_ready_plants['PlantID_PLT2'] == True, 'PlantID'] = 'PLT2'
-    model_ready_plants.loc[model_ready_plants['PlantID_PLT3'] == True, 'PlantID'] = 'PLT3'
-    
-    plant_capacity = model_ready_plants.groupby('PlantID')['CapacityUtilization'].mean()
+if 'PlantID' in model_ready.columns:
+    plant_capacity = model_ready.groupby('PlantID', observed=True)['CapacityUtilization'].mean()
     plant_capacity.plot(kind='bar', alpha=0.7, color=['#1f77b4', '#ff7f0e', '#2ca02c'])
     plt.title('Average Capacity Utilization by Plant')
     plt.ylabel('Capacity Utilization')
@@ -415,7 +409,7 @@ plt.xticks(rotation=45)
 # Bottleneck analysis
 plt.subplot(3, 4, 8)
 if 'IsBottleneck' in model_ready.columns:
-    bottleneck_by_wc = model_ready.groupby('WorkCenterID')['IsBottleneck'].mean().sort_values(ascending=False)
+    bottleneck_by_wc = model_ready.groupby('WorkCenterID', observed=True)['IsBottleneck'].mean().sort_values(ascending=False)
     bottleneck_by_wc.head(10).plot(kind='bar', alpha=0.7, color='red')
     plt.title('Bottleneck Rate by Work Center')
     plt.ylabel('Bottleneck Rate')
@@ -423,8 +417,8 @@ if 'IsBottleneck' in model_ready.columns:
 
 # Quality vs complexity
 plt.subplot(3, 4, 9)
-if 'ProductComplexity' in locals():
-    complexity_quality = model_ready_complexity.groupby('ProductComplexity').agg({
+if 'ProductComplexity' in model_ready.columns:
+    complexity_quality = model_ready.groupby('ProductComplexity', observed=True).agg({
         'YieldRate_pct': 'mean',
         'ScrapRate': 'mean'
     })
@@ -452,7 +446,7 @@ if 'CapacityStress' in model_ready.columns:
 # Network complexity
 plt.subplot(3, 4, 12)
 # Material-WorkCenter network density
-material_wc_pairs = model_ready.groupby(['MaterialNumber', 'WorkCenterID']).size().reset_index(name='Operations')
+material_wc_pairs = model_ready.groupby(['MaterialNumber', 'WorkCenterID'], observed=True).size().reset_index(name='Operations')
 network_density = len(material_wc_pairs) / (model_ready['MaterialNumber'].nunique() * model_ready['WorkCenterID'].nunique())
 plt.text(0.5, 0.5, f'Manufacturing\\nNetwork Density\\n{network_density:.3f}', 
          ha='center', va='center', fontsize=14, 
@@ -6,7 +6,6 @@ This script analyzes relationships and connections between all datasets
 for IT collaboration and system understanding.
 """
 
-import pandas as pd
 import numpy as np
 import matplotlib.pyplot as plt
 import seaborn as sns
@@ -14,6 +13,9 @@ from matplotlib.dates import DateFormatter
 import warnings
 warnings.filterwarnings('ignore')
 
+from dataset_cache import load_dataset, load_features
+from routing_index import RoutingIndex
+
 # Configure plotting
 plt.style.use('seaborn-v0_8')
 sns.set_palette("husl")
@@ -27,12 +29,15 @@ print("="*80)
 print("\n📁 LOADING ALL DATASETS...")
 try:
     # Core datasets
-    material_master = pd.read_csv("out/material_master.csv")
-    bom_table = pd.read_csv("out/bom_table.csv")
-    routing_table = pd.read_csv("out/routing_table.csv")
-    production_orders = pd.read_csv("out/production_orders.csv", parse_dates=["OrderDate"])
-    nal = pd.read_csv("out/NAL.csv", parse_dates=["RecordDateTime"])
-    model_ready = pd.read_csv("out/model_ready.csv", parse_dates=["RecordDateTime"])
+    material_master = load_dataset("material_master")
+    bom_table = load_dataset("bom_table")
+    routing_table = load_dataset("routing_table")
+    production_orders = load_dataset("production_orders")
+    nal = load_dataset("NAL")
+    # Model-ready features with categorical columns kept, from its matrix export
+    model_ready = load_features()
+    routing_index = RoutingIndex(routing_table)
+    ops_per_material = routing_index.op_counts()
     
     print("✅ All datasets loaded successfully!")
     
@@ -65,7 +70,7 @@ material_counts = material_master['MaterialType'].value_counts()
 print(f"Material Types: {material_counts.to_dict()}")
 
 # Material complexity distribution
-complexity_dist = material_master.groupby(['MaterialType', 'ProductComplexity']).size().unstack(fill_value=0)
+complexity_dist = material_master.groupby(['MaterialType', 'ProductComplexity'], observed=True).size().unstack(fill_value=0)
 print(f"\nComplexity Distribution:\n{complexity_dist}")
 
 # Visualize material hierarchy
@@ -106,7 +111,7 @@ print("\n2️⃣ BILL OF MATERIALS (BOM) NETWORK")
 print("-" * 50)
 
 # BOM complexity metrics
-bom_stats = bom_table.groupby('ParentMaterial').agg({
+bom_stats = bom_table.groupby('ParentMaterial', observed=True).agg({
     'ComponentMaterial': 'count',
     'Quantity': ['sum', 'mean', 'std']
 }).round(2)
@@ -118,7 +123,7 @@ print("🔧 Most Complex Products (by component count):")
 print(top_complex[['Component_Count', 'Total_Qty', 'Avg_Qty_Per_Component']])
 
 # BOM level analysis
-level_analysis = bom_table.groupby('Level').agg({
+level_analysis = bom_table.groupby('Level', observed=True).agg({
     'ParentMaterial': 'nunique',
     'ComponentMaterial': 'nunique',
     'Quantity': ['sum', 'mean', 'std']
@@ -156,7 +161,8 @@ parent_component_matrix = bom_table.pivot_table(
     columns='ComponentMaterial', 
     values='Quantity', 
     aggfunc='sum', 
-    fill_value=0
+    fill_value=0,
+    observed=True
 )
 # Show subset for visualization
 subset_matrix = parent_component_matrix.iloc[:10, :15]  # Top 10 parents, 15 components
@@ -174,7 +180,7 @@ print("\n3️⃣ ROUTING & WORK CENTER NETWORK")
 print("-" * 50)
 
 # Work center analysis
-wc_analysis = routing_table.groupby('WorkCenter').agg({
+wc_analysis = routing_table.groupby('WorkCenter', observed=True).agg({
     'MaterialNumber': 'nunique',
     'SetupTime_min': ['mean', 'std'],
     'RunTime_min': ['mean', 'std'],
@@ -184,7 +190,7 @@ wc_analysis.columns = ['Materials', 'Setup_Mean', 'Setup_Std', 'Run_Mean', 'Run_
 wc_analysis['Total_Mean_Time'] = wc_analysis['Setup_Mean'] + wc_analysis['Run_Mean']
 
 print(f"Work Centers: {routing_table['WorkCenter'].nunique()}")
-print(f"Materials with routings: {routing_table['MaterialNumber'].nunique()}")
+print(f"Materials with routings: {len(routing_index)}")
 print(f"Machine Classes: {routing_table['MachineClass'].nunique()}")
 
 # Top loaded work centers
@@ -193,7 +199,7 @@ print(f"\n🏭 Most Time-Intensive Work Centers:")
 print(top_wc[['Materials', 'Setup_Mean', 'Run_Mean', 'Total_Mean_Time', 'Operations']])
 
 # Machine class distribution
-machine_analysis = routing_table.groupby('MachineClass').agg({
+machine_analysis = routing_table.groupby('MachineClass', observed=True).agg({
     'WorkCenter': 'nunique',
     'MaterialNumber': 'nunique',
     'SetupTime_min': 'mean',
@@ -233,7 +239,8 @@ wc_machine_matrix = routing_table.pivot_table(
     columns='MachineClass', 
     values='OperationSeq', 
     aggfunc='count', 
-    fill_value=0
+    fill_value=0,
+    observed=True
 )
 sns.heatmap(wc_machine_matrix, annot=True, fmt='d', cmap='YlOrRd', ax=axes[1, 1])
 axes[1, 1].set_title('Work Center × Machine Class Matrix')
@@ -246,7 +253,7 @@ print("\n4️⃣ PRODUCTION ORDERS PATTERN ANALYSIS")
 print("-" * 50)
 
 # Order analysis
-order_analysis = production_orders.groupby('MaterialNumber').agg({
+order_analysis = production_orders.groupby('MaterialNumber', observed=True).agg({
     'ProductionOrderID': 'count',
     'PlannedQty': ['sum', 'mean', 'std'],
     'OrderDate': ['min', 'max']
@@ -263,7 +270,7 @@ print("📦 Most Frequently Ordered Materials:")
 print(top_ordered[['Order_Count', 'Total_Planned', 'Avg_Planned', 'Order_Frequency']])
 
 # Plant distribution
-plant_analysis = production_orders.groupby('PlantID').agg({
+plant_analysis = production_orders.groupby('PlantID', observed=True).agg({
     'ProductionOrderID': 'count',
     'PlannedQty': ['sum', 'mean'],
     'MaterialNumber': 'nunique'
@@ -312,13 +319,10 @@ plt.show()
 print("\n5️⃣ CROSS-DATASET RELATIONSHIPS")
 print("-" * 50)
 
-# Material complexity vs routing complexity
-material_routing = routing_table.merge(material_master[['MaterialNumber', 'ProductComplexity']], 
-                                     on='MaterialNumber', how='left')
-
 # Operations per material by complexity
-ops_by_complexity = material_routing.groupby(['MaterialNumber', 'ProductComplexity']).size().reset_index(name='Operation_Count')
-complexity_ops = ops_by_complexity.groupby('ProductComplexity')['Operation_Count'].agg(['mean', 'std', 'count']).round(2)
+ops_by_complexity = ops_per_material.reset_index().merge(material_master[['MaterialNumber', 'ProductComplexity']], 
+                                                         on='MaterialNumber', how='inner')
+complexity_ops = ops_by_complexity.groupby('ProductComplexity', observed=True)['Operation_Count'].agg(['mean', 'std', 'count']).round(2)
 
 print("🔧 Product Complexity vs Operations:")
 print(complexity_ops)
@@ -331,7 +335,8 @@ plant_type_matrix = plant_materials.pivot_table(
     columns='MaterialType', 
     values='ProductionOrderID', 
     aggfunc='count', 
-    fill_value=0
+    fill_value=0,
+    observed=True
 )
 
 print(f"\n🏭 Plant × Material Type Matrix:")
@@ -339,7 +344,7 @@ print(plant_type_matrix)
 
 # Production volume vs BOM complexity
 bom_complexity = bom_stats.reset_index()
-production_volume = production_orders.groupby('MaterialNumber')['PlannedQty'].sum().reset_index()
+production_volume = production_orders.groupby('MaterialNumber', observed=True)['PlannedQty'].sum().reset_index()
 volume_complexity = production_volume.merge(bom_complexity, left_on='MaterialNumber', right_on='ParentMaterial', how='inner')
 
 if len(volume_complexity) > 0:
@@ -373,7 +378,7 @@ if len(model_ready) > 0:
 
 # Work center performance analysis
 if 'WorkCenterID' in model_ready.columns:
-    wc_performance = model_ready.groupby('WorkCenterID').agg({
+    wc_performance = model_ready.groupby('WorkCenterID', observed=True).agg({
         'CapacityUtilization': 'mean',
         'YieldRate_pct': 'mean',
         'Downtime_min': 'sum',
@@ -408,7 +413,7 @@ plt.ylabel('Number of Products')
 
 # 3. Work center network
 plt.subplot(3, 4, 3)
-wc_material_count = routing_table.groupby('WorkCenter')['MaterialNumber'].nunique().sort_values(ascending=False)
+wc_material_count = routing_table.groupby('WorkCenter', observed=True)['MaterialNumber'].nunique().sort_values(ascending=False)
 wc_material_count.head(10).plot(kind='barh', alpha=0.7)
 plt.title('Top 10 Work Centers by Material Count')
 plt.xlabel('Number of Materials')
@@ -454,7 +459,7 @@ if len(model_ready) > 0:
 # 9. Downtime analysis
 plt.subplot(3, 4, 9)
 if len(model_ready) > 0:
-    downtime_by_reason = model_ready.groupby('DowntimeReason')['Downtime_min'].sum().sort_values(ascending=False)
+    downtime_by_reason = model_ready.groupby('DowntimeReason', observed=True)['Downtime_min'].sum().sort_values(ascending=False)
     if len(downtime_by_reason) > 0:
         downtime_by_reason.plot(kind='bar', alpha=0.7)
         plt.title('Downtime by Reason')
@@ -530,14 +535,14 @@ print(f"""
 
 📊 DATASET CONNECTIONS:
 • Material Master ↔ BOM Table: {len(set(material_master['MaterialNumber']) & set(bom_table['ParentMaterial']))} common materials
-• Material Master ↔ Routing Table: {len(set(material_master['MaterialNumber']) & set(routing_table['MaterialNumber']))} common materials  
+• Material Master ↔ Routing Table: {material_master['MaterialNumber'].isin(routing_index.materials).sum()} common materials  
 • Production Orders ↔ Material Master: {len(set(production_orders['MaterialNumber']) & set(material_master['MaterialNumber']))} common materials
 • Production Orders ↔ NAL Events: {len(set(production_orders['ProductionOrderID']) & set(nal['ProductionOrderID']))} common orders
 
 🎯 KEY SYSTEM CHARACTERISTICS:
 • Material Hierarchy: {material_counts.to_dict()}
 • BOM Complexity: Avg {bom_stats['Component_Count'].mean():.1f} components per product
-• Routing Complexity: Avg {routing_table.groupby('MaterialNumber').size().mean():.1f} operations per material
+• Routing Complexity: Avg {ops_per_material.mean():.1f} operations per material
 • Production Volume: {production_orders['PlannedQty'].sum():,} total planned units
 • Operational Events: {len(nal):,} raw events → {len(model_ready):,} processed records
 
@@ -556,7 +561,7 @@ if len(model_ready) > 0:
     
     # Work center performance
     if 'WorkCenterID' in model_ready.columns:
-        wc_performance = model_ready.groupby('WorkCenterID')['CapacityUtilization'].mean()
+        wc_performance = model_ready.groupby('WorkCenterID', observed=True)['CapacityUtilization'].mean()
         top_wc = wc_performance.nlargest(1)
         print(f"• Highest Utilized Work Center: {top_wc.index[0]} ({top_wc.iloc[0]:.1%})")
 
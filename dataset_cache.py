@@ -0,0 +1,67 @@
+# dataset_cache.py (Shared loader for the analysis scripts, backed by binary snapshots)
+
+import hashlib
+import json
+import os
+
+import pandas as pd
+
+from model_ready import FeatureMatrix
+from schema import CATEGORY_MAX_SHARE, SCHEMA, compact, memory_mb
+from table_io import OUT_DIR, file_digest, read_table, resolve_table
+
+CACHE_DIR = OUT_DIR / ".cache"
+DIGESTS_PATH = CACHE_DIR / "digests.json"
+# Parsed on every load, so each table has one snapshot whichever script asks
+DATE_COLUMNS = {"production_orders": ["OrderDate"], "NAL": ["RecordDateTime"]}
+
+
+def source_digest(path):
+    """
+    SHA-256 of a source table, rehashed only when its size or mtime changed
+    since the last time (remembered in out/.cache/digests.json).
+    """
+    st = path.stat()
+    digests = json.loads(DIGESTS_PATH.read_text()) if DIGESTS_PATH.exists() else {}
+    known = digests.get(str(path))
+    if known and (known["size"], known["mtime_ns"]) == (st.st_size, st.st_mtime_ns):
+        return known["sha256"]
+    digest = file_digest(path)
+    digests[str(path)] = {"size": st.st_size, "mtime_ns": st.st_mtime_ns, "sha256": digest}
+    CACHE_DIR.mkdir(parents=True, exist_ok=True)
+    DIGESTS_PATH.write_text(json.dumps(digests, indent=2))
+    return digest
+
+
+def snapshot_key(name, path):
+    """Source content hash combined with everything else that shapes the loaded frame."""
+    parts = [source_digest(path), DATE_COLUMNS.get(name), sorted(SCHEMA.items()), CATEGORY_MAX_SHARE,
+             pd.__version__]
+    return hashlib.sha256(repr(parts).encode()).hexdigest()[:16]
+
+
+def load_dataset(name):
+    """
+    out/<name> with its date columns parsed and compacted (see schema.py).
+    The first load writes a pickle snapshot to out/.cache; later loads return
+    it until the source content changes, when it is parsed and written again.
+    """
+    path = resolve_table(name)
+    snapshot = CACHE_DIR / f"{name}-{snapshot_key(name, path)}.pkl"
+    if snapshot.exists():
+        df = pd.read_pickle(snapshot)
+        print(f"• {name}: {memory_mb(df):,.1f} MB (snapshot)")
+        return df
+
+    df = compact(read_table(name, parse_dates=DATE_COLUMNS.get(name)), name)
+    for old in CACHE_DIR.glob(f"{name}-*.pkl"):
+        old.unlink()
+    tmp = snapshot.with_suffix(".tmp")
+    df.to_pickle(tmp)
+    os.replace(tmp, snapshot)  # never leave a half-written snapshot under the final name
+    return df
+
+
+def load_features():
+    """The model-ready matrix export as a compacted DataFrame with categorical columns (already binary)."""
+    return compact(FeatureMatrix.load().frame(), "model_ready")
@@ -0,0 +1,107 @@
+# dirty_data.py (Composable dirty-data injection with ground-truth labels)
+
+import json
+
+import numpy as np
+import pandas as pd
+
+INJECTORS = {}
+LABEL_COLUMNS = ["EventID", "Injector", "Column"]
+
+
+def injector(name):
+    """Register fn(df, mask, column, rng, **params) -> df under `name`."""
+    def register(fn):
+        INJECTORS[name] = fn
+        return fn
+    return register
+
+
+def _widen(df, column, to_float):
+    # Cast up front (even for an empty mask) so every chunk gets the same dtype
+    if to_float and df[column].dtype.kind in "iub":
+        df[column] = df[column].astype("float64")
+
+
+@injector("nulls")
+def inject_nulls(df, mask, column, rng):
+    _widen(df, column, True)
+    df.loc[mask, column] = None if df[column].dtype == object else np.nan
+    return df
+
+
+@injector("outlier")
+def inject_outlier(df, mask, column, rng, factor=5):
+    _widen(df, column, not float(factor).is_integer())
+    df.loc[mask, column] *= factor
+    return df
+
+
+@injector("unit_error")
+def inject_unit_error(df, mask, column, rng, factor=60):
+    # e.g. a duration booked in hours but read as minutes (or vice versa)
+    _widen(df, column, not float(factor).is_integer())
+    df.loc[mask, column] *= factor
+    return df
+
+
+@injector("clock_skew")
+def inject_clock_skew(df, mask, column, rng, max_minutes=120):
+    skew = rng.integers(-max_minutes, max_minutes + 1, int(mask.sum()))
+    df.loc[mask, column] += pd.to_timedelta(skew, unit="m")
+    return df
+
+
+@injector("swap_ids")
+def inject_swap_ids(df, mask, column, rng):
+    # Rotate the values of the selected rows, so each gets another row's ID
+    idx = np.flatnonzero(mask)
+    df.iloc[idx, df.columns.get_loc(column)] = df[column].to_numpy()[np.roll(idx, 1)]
+    return df
+
+
+@injector("duplicate_rows")
+def inject_duplicate_rows(df, mask, column, rng):
+    return pd.concat([df, df[mask]], ignore_index=True)
+
+
+def load_spec(path):
+    """
+    Read a JSON list of injections, e.g.
+    [{"kind": "nulls", "column": "OperatorID", "rate": 0.03},
+     {"kind": "outlier", "column": "RunTime_Actual_min", "rate": 0.01, "factor": 5}]
+    """
+    with open(path) as f:
+        spec = json.load(f)
+    unknown = {s["kind"] for s in spec} - INJECTORS.keys()
+    if unknown:
+        raise ValueError(f"Unknown injector(s) {sorted(unknown)}; expected one of {sorted(INJECTORS)}")
+    return spec
+
+
+def inject(df, spec, rng, id_column="EventID", new_ids=None):
+    """
+    Apply every injection in `spec` to one chunk, each as one masked array
+    operation, in spec order. Returns (dirty df, labels) where labels has
+    one row per corrupted (EventID, Injector, Column). Rows an injection
+    appends (duplicate_rows copies) get fresh IDs from new_ids(n) when given
+    (otherwise they keep the source row's ID); their labels carry the
+    copies' IDs, so a copy can be told from its original.
+    """
+    labels = []
+    for step in spec:
+        params = {k: v for k, v in step.items() if k not in ("kind", "column", "rate")}
+        column = step.get("column", id_column)
+        mask = rng.random(len(df)) < step["rate"]
+        before = df[column].to_numpy()[mask] if step["kind"] == "swap_ids" else None
+        df = INJECTORS[step["kind"]](df, mask, column, rng, **params)
+        n_added = len(df) - len(mask)
+        if n_added and new_ids is not None:
+            df[id_column] = np.concatenate([df[id_column].to_numpy()[:len(mask)], new_ids(n_added)])
+        ids = df[id_column].to_numpy()[len(mask):] if n_added else df[id_column].to_numpy()[mask]
+        if before is not None:
+            # Only rows whose value really changed were corrupted
+            ids = ids[df[column].to_numpy()[:len(mask)][mask] != before]
+        labels.append(pd.DataFrame({"EventID": ids, "Injector": step["kind"], "Column": column}))
+    labels = pd.concat(labels, ignore_index=True) if labels else pd.DataFrame(columns=LABEL_COLUMNS)
+    return df, labels
@@ -3,7 +3,10 @@
 import pandas as pd
 import matplotlib.pyplot as plt
 
-df = pd.read_csv("out/model_ready.csv")
+from dataset_cache import load_features
+
+# Model-ready features with categorical columns kept, from its matrix export
+df = load_features()
 
 # Check if column RecordDateTime spans over 1 year 
 if df['RecordDateTime'].dtype == 'object':
@@ -46,7 +49,7 @@ fig = plt.figure(figsize=(20, 16))
 
 # 1. Time Series Plot - Production activity over time
 plt.subplot(3, 4, 1)
-df_time = df.groupby('Date').size().reset_index(name='RecordCount')
+df_time = df.groupby('Date', observed=True).size().reset_index(name='RecordCount')
 df_time['Date'] = pd.to_datetime(df_time['Date'])
 plt.plot(df_time['Date'], df_time['RecordCount'], alpha=0.7, linewidth=1)
 plt.title('Production Activity Over Time')
@@ -78,7 +81,7 @@ plt.ylabel('Frequency')
 
 # 5. Downtime Analysis
 plt.subplot(3, 4, 5)
-downtime_by_reason = df.groupby('DowntimeReason')['Downtime_min'].sum().sort_values(ascending=False)
+downtime_by_reason = df.groupby('DowntimeReason', observed=True)['Downtime_min'].sum().sort_values(ascending=False)
 plt.bar(downtime_by_reason.index, downtime_by_reason.values, alpha=0.7)
 plt.title('Downtime by Reason')
 plt.xlabel('Downtime Reason')
@@ -94,24 +97,14 @@ plt.ylabel('Run Time (minutes)')
 
 # 7. Product Complexity Distribution
 plt.subplot(3, 4, 7)
-complexity_cols = ['ProductComplexity_LOW', 'ProductComplexity_MED']
-complexity_data = []
-for col in complexity_cols:
-    complexity_data.append(df[col].sum())
-complexity_data.append(len(df) - sum(complexity_data))  # HIGH complexity
-complexity_labels = ['LOW', 'MED', 'HIGH']
-plt.pie(complexity_data, labels=complexity_labels, autopct='%1.1f%%', startangle=90)
+complexity_counts = df['ProductComplexity'].value_counts().reindex(['LOW', 'MED', 'HIGH'], fill_value=0)
+plt.pie(complexity_counts.values, labels=complexity_counts.index, autopct='%1.1f%%', startangle=90)
 plt.title('Product Complexity Distribution')
 
 # 8. Machine Class Distribution
 plt.subplot(3, 4, 8)
-machine_cols = [col for col in df.columns if col.startswith('MachineClass_')]
-machine_data = [df[col].sum() for col in machine_cols]
-machine_labels = [col.replace('MachineClass_', '') for col in machine_cols]
-# Add CNC (assuming it's the remaining)
-machine_data.append(len(df) - sum(machine_data))
-machine_labels.append('CNC')
-plt.pie(machine_data, labels=machine_labels, autopct='%1.1f%%', startangle=90)
+machine_counts = df['MachineClass'].value_counts(sort=False)
+plt.pie(machine_counts.values, labels=machine_counts.index, autopct='%1.1f%%', startangle=90)
 plt.title('Machine Class Distribution')
 
 # 9. Planned vs Actual Quantity
@@ -134,13 +127,8 @@ plt.ylabel('Frequency')
 
 # 11. Plant Performance Comparison
 plt.subplot(3, 4, 11)
-plant_cols = [col for col in df.columns if col.startswith('PlantID_')]
-plant_data = [df[col].sum() for col in plant_cols]
-plant_labels = [col.replace('PlantID_', '') for col in plant_cols]
-# Add PLT1 (assuming it's the remaining)
-plant_data.append(len(df) - sum(plant_data))
-plant_labels.append('PLT1')
-plt.bar(plant_labels, plant_data, alpha=0.7)
+plant_counts = df['PlantID'].value_counts(sort=False)
+plt.bar(plant_counts.index, plant_counts.values, alpha=0.7)
 plt.title('Production by Plant')
 plt.xlabel('Plant ID')
 plt.ylabel('Number of Records')
@@ -184,7 +172,7 @@ plt.show()
 
 # Time series of key metrics
 fig, axes = plt.subplots(2, 2, figsize=(15, 10))
-df_daily = df.groupby('Date').agg({
+df_daily = df.groupby('Date', observed=True).agg({
     'YieldRate_pct': 'mean',
     'Downtime_min': 'sum',
     'ScrapQty': 'sum',
@@ -223,17 +211,11 @@ plt.show()
 fig, axes = plt.subplots(2, 2, figsize=(15, 10))
 
 # Yield Rate by Product Complexity
-complexity_data = []
-if df['ProductComplexity_LOW'].sum() > 0:
-    complexity_data.append(df[df['ProductComplexity_LOW'] == True]['YieldRate_pct'].values)
-if df['ProductComplexity_MED'].sum() > 0:
-    complexity_data.append(df[df['ProductComplexity_MED'] == True]['YieldRate_pct'].values)
-# HIGH complexity (neither LOW nor MED)
-high_complexity = df[(df['ProductComplexity_LOW'] == False) & (df['ProductComplexity_MED'] == False)]
-if len(high_complexity) > 0:
-    complexity_data.append(high_complexity['YieldRate_pct'].values)
-
-axes[0, 0].boxplot(complexity_data, labels=['LOW', 'MED', 'HIGH'][:len(complexity_data)])
+yield_by_complexity = df.groupby('ProductComplexity', observed=True)['YieldRate_pct']
+complexity_labels = [c for c in ['LOW', 'MED', 'HIGH'] if c in yield_by_complexity.groups]
+complexity_data = [yield_by_complexity.get_group(c).values for c in complexity_labels]
+
+axes[0, 0].boxplot(complexity_data, labels=complexity_labels)
 axes[0, 0].set_title('Yield Rate by Product Complexity')
 axes[0, 0].set_ylabel('Yield Rate (%)')
 
@@ -246,13 +228,9 @@ axes[0, 1].set_ylabel('Downtime (minutes)')
 axes[0, 1].tick_params(axis='x', rotation=45)
 
 # Setup Time by Machine Class
-machine_classes = []
-machine_data = []
-for col in df.columns:
-    if col.startswith('MachineClass_') and df[col].sum() > 0:
-        machine_name = col.replace('MachineClass_', '')
-        machine_classes.append(machine_name)
-        machine_data.append(df[df[col] == True]['SetupTime_Actual_min'].values)
+setup_by_machine = df.groupby('MachineClass', observed=True)['SetupTime_Actual_min']
+machine_classes = list(setup_by_machine.groups)
+machine_data = [setup_by_machine.get_group(m).values for m in machine_classes]
 
 axes[1, 0].boxplot(machine_data, labels=machine_classes)
 axes[1, 0].set_title('Setup Time by Machine Class')
@@ -260,13 +238,9 @@ axes[1, 0].set_ylabel('Setup Time (minutes)')
 axes[1, 0].tick_params(axis='x', rotation=45)
 
 # Scrap Quantity by Plant
-plant_classes = []
-plant_data = []
-for col in df.columns:
-    if col.startswith('PlantID_') and df[col].sum() > 0:
-        plant_name = col.replace('PlantID_', '')
-        plant_classes.append(plant_name)
-        plant_data.append(df[df[col] == True]['ScrapQty'].values)
+scrap_by_plant = df.groupby('PlantID', observed=True)['ScrapQty']
+plant_classes = list(scrap_by_plant.groups)
+plant_data = [scrap_by_plant.get_group(p).values for p in plant_classes]
 
 axes[1, 1].boxplot(plant_data, labels=plant_classes)
 axes[1, 1].set_title('Scrap Quantity by Plant')
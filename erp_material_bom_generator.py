@@ -1,17 +1,22 @@
 # erp_material_bom_generator.py
 
-import numpy as np, pandas as pd, random
-from faker import Faker
-from pathlib import Path
-from datetime import datetime, timedelta
+import argparse
+import numpy as np, pandas as pd
+from datetime import datetime
+
+from schema import compact
+from table_io import OUT_DIR, add_format_argument, write_table
 
 SEED = 42
 NUM_FG = 30
 NUM_SFG = 60
 NUM_RAW = 300
 NUM_ORDERS = 5000
-faker = Faker()
-random.seed(SEED)
+BOM_LEVELS = 2          # FG → SFG → RAW; every extra level adds an SFG tier
+SFG_FANOUT = (2, 4)     # components per FG/SFG parent (inclusive)
+RAW_FANOUT = (3, 7)     # raw materials per SFG of the last tier
+SHARE = 0.5             # share of sub-assembly slots that reuse an SFG another slot already took
+RAW_MIX = 0.3           # chance a component of a mid-tier SFG is a raw material
 np.random.seed(SEED)
 rng = np.random.default_rng(SEED)
 
@@ -26,70 +31,125 @@ BRANDS = [
     "Bosch", "Delphi", "Denso", "Valeo", "Magneti Marelli", "ACDelco", "TRW", "Continental",
     "OEM", "Genuine", "Aftermarket", "Remanufactured", "Performance", "HD", "Sport"]
 
-def part_name():
-    return f"{random.choice(BRANDS)} {random.choice(PARTS)}"
+# Every "Brand Part" combination once; names are drawn as codes into this table
+PART_NAMES = [f"{brand} {part}" for brand in BRANDS for part in PARTS]
+COMPLEXITY = ["LOW", "MED", "HIGH"]
+
+def part_names(n):
+    return pd.Categorical.from_codes(rng.integers(0, len(PART_NAMES), n), PART_NAMES)
+
+def material_numbers(prefix, n):
+    return np.char.add(prefix, np.char.zfill(np.arange(1, n + 1).astype(str), 4))
 
-def generate_material_master():
-    rows = []
-    for i in range(NUM_FG):
-        rows.append({"MaterialNumber": f"FG{i+1:04}", "MaterialType": "FG",
-                     "MaterialName": part_name(),
-                     "ProductComplexity": rng.choice(["LOW","MED","HIGH"], p=[0.4,0.4,0.2])})
-    for i in range(NUM_SFG):
-        rows.append({"MaterialNumber": f"SFG{i+1:04}", "MaterialType": "SFG",
-                     "MaterialName": part_name(),
-                     "ProductComplexity": rng.choice(["LOW","MED","HIGH"], p=[0.6,0.3,0.1])})
-    for i in range(NUM_RAW):
-        rows.append({"MaterialNumber": f"RAW{i+1:04}", "MaterialType": "RAW",
-                     "MaterialName": part_name(), "ProductComplexity": "LOW"})
-    return pd.DataFrame(rows)
+def generate_material_master(n_fg=NUM_FG, n_sfg=NUM_SFG, n_raw=NUM_RAW):
+    # FG: 40/40/20 LOW/MED/HIGH, SFG: 60/30/10, RAW: always LOW
+    complexity = np.concatenate([
+        rng.choice(3, n_fg, p=[0.4, 0.4, 0.2]),
+        rng.choice(3, n_sfg, p=[0.6, 0.3, 0.1]),
+        np.zeros(n_raw, dtype=int),
+    ])
+    return pd.DataFrame({
+        "MaterialNumber": np.concatenate([material_numbers("FG", n_fg),
+                                          material_numbers("SFG", n_sfg),
+                                          material_numbers("RAW", n_raw)]),
+        "MaterialType": pd.Categorical.from_codes(
+            np.repeat([0, 1, 2], [n_fg, n_sfg, n_raw]), ["FG", "SFG", "RAW"]),
+        "MaterialName": part_names(n_fg + n_sfg + n_raw),
+        "ProductComplexity": pd.Categorical.from_codes(complexity, COMPLEXITY),
+    })
 
-def generate_bom(materials):
-    bom_rows = []
-    fg_list = materials[materials.MaterialType=="FG"]["MaterialNumber"].tolist()
-    sfg_list = materials[materials.MaterialType=="SFG"]["MaterialNumber"].tolist()
-    raw_list = materials[materials.MaterialType=="RAW"]["MaterialNumber"].tolist()
-    for fg in fg_list:
-        sfg_used = rng.choice(sfg_list, size=rng.integers(2, 5), replace=False)
-        for sfg in sfg_used:
-            qty = rng.integers(1, 4)
-            bom_rows.append({"ParentMaterial": fg, "ComponentMaterial": sfg,
-                             "Quantity": qty, "Level": 1})
-    for sfg in sfg_list:
-        raw_used = rng.choice(raw_list, size=rng.integers(3, 8), replace=False)
-        for raw in raw_used:
-            qty = rng.integers(1, 10)
-            bom_rows.append({"ParentMaterial": sfg, "ComponentMaterial": raw,
-                             "Quantity": qty, "Level": 2})
-    return pd.DataFrame(bom_rows)
+def tier_size(n_slots, share, available):
+    """
+    SFGs for a tier fed by n_slots sub-assembly slots: (1 - share) of the
+    slots, so that every SFG gets a parent and `share` of the slots reuse
+    one. At least one (when there are slots), at most `available`.
+    """
+    return min(available, n_slots, max(1, round((1 - share) * n_slots))) if n_slots else 0
+
+def generate_bom(materials, levels=BOM_LEVELS, share=SHARE, raw_mix=RAW_MIX,
+                 sfg_fanout=SFG_FANOUT, raw_fanout=RAW_FANOUT):
+    """
+    DAG BOM of the given depth: FG → SFG tier 1 → … → SFG tier levels-1 → RAW.
+    Each tier is sized from the sub-assembly slots of the tier above (see
+    tier_size): its SFGs fill one slot each and the remaining `share` of the
+    slots pick any of them, so SFGs end up shared by several parents. When
+    the SFGs run short, deeper tiers get fewer and reuse more; SFGs left
+    over stay out of the BOM. Below the FGs a slot is a raw material with
+    probability `raw_mix`; the last SFG tier only has raws. Built one tier
+    at a time as whole arrays.
+    """
+    types = materials.MaterialType.to_numpy()
+    sfg = np.flatnonzero(types == "SFG")
+    if levels < 2 or len(sfg) < levels - 1:
+        raise ValueError(f"levels={levels} needs levels >= 2 and at least levels-1 SFGs (have {len(sfg)})")
+    raw = np.flatnonzero(types == "RAW")
+    parents, n_used, edges = np.flatnonzero(types == "FG"), 0, []
+    for level in range(1, levels + 1):
+        last = level == levels
+        lo, hi = raw_fanout if last else sfg_fanout
+        parent = np.repeat(parents, rng.integers(lo, hi + 1, len(parents)))
+        is_raw = np.ones(len(parent), bool) if last else (level > 1) & (rng.random(len(parent)) < raw_mix)
+        child = raw[rng.integers(0, len(raw), len(parent))]
+        if not last:
+            slots = np.flatnonzero(~is_raw)
+            # Keep one SFG back for every tier still below this one
+            n_pool = tier_size(len(slots), share, len(sfg) - n_used - (levels - 1 - level))
+            pool = sfg[n_used:n_used + n_pool]
+            n_used += n_pool
+            # Slots that drew "unused SFG" first: the first n_pool take each SFG once
+            slots = slots[np.argsort(rng.random(len(slots)) < share, kind="stable")]
+            child[slots[:n_pool]] = rng.permutation(pool)
+            if n_pool:
+                child[slots[n_pool:]] = pool[rng.integers(0, n_pool, len(slots) - n_pool)]
+            parents = pool
+        qty = np.where(is_raw, rng.integers(1, 10, len(parent)), rng.integers(1, 4, len(parent)))
+        edges.append(pd.DataFrame({"Parent": parent, "Component": child, "Quantity": qty, "Level": level}))
+    edges = pd.concat(edges, ignore_index=True).drop_duplicates(["Parent", "Component"], ignore_index=True)
+    numbers = materials.MaterialNumber.astype(str).to_numpy()
+    return pd.DataFrame({
+        "ParentMaterial": pd.Categorical.from_codes(edges.Parent, numbers),
+        "ComponentMaterial": pd.Categorical.from_codes(edges.Component, numbers),
+        "Quantity": edges.Quantity,
+        "Level": edges.Level,
+    })
 
 def generate_production_orders(materials, n_orders=NUM_ORDERS):
-    fg_list = materials[materials.MaterialType=="FG"]
-    recs = []
-    start_date = datetime(2025, 1, 1)
-    for i in range(n_orders):
-        fg = fg_list.sample(1).iloc[0]
-        recs.append({
-            "ProductionOrderID": f"PO{100000+i}",
-            "MaterialNumber": fg["MaterialNumber"],
-            "MaterialName": fg["MaterialName"],
-            "ProductComplexity": fg["ProductComplexity"],
-            "OrderDate": start_date + timedelta(days=int(rng.integers(0, 365))),
-            "PlannedQty": int(rng.integers(10, 200)),
-            "MachineClass": rng.choice(MACH_CLASSES),
-            "PlantID": rng.choice(["PLT1","PLT2","PLT3"])
-        })
-    return pd.DataFrame(recs)
+    fg_cols = ["MaterialNumber", "MaterialName", "ProductComplexity"]
+    fg_list = materials.loc[materials.MaterialType=="FG", fg_cols].astype("category")
+    # Taking rows of categorical columns only gathers integer codes
+    fg = fg_list.iloc[rng.integers(0, len(fg_list), n_orders)].reset_index(drop=True)
+    start_date = np.datetime64(datetime(2025, 1, 1), "D")
+    return pd.DataFrame({
+        "ProductionOrderID": np.char.add("PO", np.arange(100000, 100000 + n_orders).astype(str)),
+        **{c: fg[c] for c in fg_cols},
+        "OrderDate": (start_date + rng.integers(0, 365, n_orders)).astype("datetime64[ns]"),
+        "PlannedQty": rng.integers(10, 200, n_orders),
+        "MachineClass": pd.Categorical.from_codes(rng.integers(0, len(MACH_CLASSES), n_orders), MACH_CLASSES),
+        "PlantID": pd.Categorical.from_codes(rng.integers(0, 3, n_orders), ["PLT1","PLT2","PLT3"]),
+    })
 
 if __name__ == "__main__":
-    Path("out").mkdir(exist_ok=True)
-    mm = generate_material_master()
-    bom = generate_bom(mm)
-    orders = generate_production_orders(mm)
-    mm.to_csv("out/material_master.csv", index=False)
-    bom.to_csv("out/bom_table.csv", index=False)
-    orders.to_csv("out/production_orders.csv", index=False)
+    parser = argparse.ArgumentParser(description="Generate material master, BOM and production orders.")
+    parser.add_argument("--fg", type=int, default=NUM_FG)
+    parser.add_argument("--sfg", type=int, default=NUM_SFG)
+    parser.add_argument("--raw", type=int, default=NUM_RAW)
+    parser.add_argument("--orders", type=int, default=NUM_ORDERS)
+    parser.add_argument("--levels", type=int, default=BOM_LEVELS, help="BOM depth (FG → … → RAW)")
+    parser.add_argument("--share", type=float, default=SHARE, help="sub-assembly sharing ratio")
+    add_format_argument(parser)
+    args = parser.parse_args()
+
+    OUT_DIR.mkdir(exist_ok=True)
+    mm = generate_material_master(args.fg, args.sfg, args.raw)
+    bom = generate_bom(mm, args.levels, args.share)
+    orders = generate_production_orders(mm, args.orders)
+    for df, name in [(mm, "material_master"), (bom, "bom_table"), (orders, "production_orders")]:
+        compact(df, name)
+    write_table(mm, "material_master", args.format)
+    write_table(bom, "bom_table", args.format)
+    write_table(orders, "production_orders", args.format)
+    ext = args.format
     print("✅ Generated:")
-    print(f"• material_master.csv   → {len(mm):,} rows")
-    print(f"• bom_table.csv         → {len(bom):,} rows")
-    print(f"• production_orders.csv → {len(orders):,} rows")
+    print(f"• material_master.{ext}   → {len(mm):,} rows")
+    print(f"• bom_table.{ext}         → {len(bom):,} rows")
+    print(f"• production_orders.{ext} → {len(orders):,} rows")
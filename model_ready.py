@@ -1,97 +1,579 @@
 #!/usr/bin/env python
 
+import argparse
+import hashlib
+import io
+import json
+import time
+from collections import ChainMap, Counter, namedtuple
+from pathlib import Path
+
 import pandas as pd
 import numpy as np
+import scipy.sparse as sp
+
+from schema import compact
+from table_io import (OUT_DIR, TableWriter, add_format_argument, iter_table, read_table, resolve_table,
+                      table_path, write_table)
+
+# Fixed one-hot vocabulary, so every batch gets the same dummy columns; the
+# first category of each is dropped. Values outside it encode as all-zero.
+ONE_HOT = {
+    "ProductComplexity": ["HIGH", "LOW", "MED"],
+    "MachineClass": ["CNC", "GRIND", "MILL", "PRESS", "ROBOT"],
+    "PlantID": ["PLT1", "PLT2", "PLT3"],
+    "Shift": ["DAY", "EVENING", "NIGHT"],
+    "DowntimeReason": ["ELEC", "MATL", "MECH", "QC"],
+}
+WATERMARK_PATH = OUT_DIR / "model_ready.watermark.json"
+MATRIX_DIR = OUT_DIR / "model_ready_matrix"
+TAIL_BYTES = 4096  # bytes before the watermark hashed to detect a rewritten NAL
+ORDER_COLUMNS = ["OrderDate", "PlannedQty"]
+NAL_TEXT_COLUMNS = ["ProductionOrderID", "WorkCenterID", "OperatorID", "MaterialNumber", "MaterialName",
+                    "PlantID", "MachineClass", "ProductComplexity", "DowntimeReason", "MaintenanceType"]
+
+# Feature name → the node that computes it; registration order is output column order
+FEATURES = {}
+Node = namedtuple("Node", "names needs fn")
+
+
+def feature(*names, needs):
+    """Register fn(cols) -> Series (or DataFrame of `names`) computed from the `needs` columns."""
+    def register(fn):
+        node = Node(names, tuple(needs), fn)
+        for name in names:
+            FEATURES[name] = node
+        return fn
+    return register
+
+
+def load_orders():
+    """Order-level columns indexed by ProductionOrderID, small enough to keep in memory."""
+    orders = read_table("production_orders", parse_dates=["OrderDate"],
+                        columns=["ProductionOrderID"] + ORDER_COLUMNS)
+    return orders.set_index(orders.pop("ProductionOrderID").astype(str))
+
 
-# 1. Load your core NAL events (you already have PlantID, MachineClass, ProductComplexity)
-df = pd.read_csv("out/NAL.csv", parse_dates=["RecordDateTime"])
+def load_events(nal=None, orders=None):
+    # 1. Load your core NAL events (you already have PlantID, MachineClass, ProductComplexity)
+    df = read_table("NAL", parse_dates=["RecordDateTime"]) if nal is None else nal
 
-# 2. Bring in order-level features (OrderDate, PlannedQty)
-orders = pd.read_csv("out/production_orders.csv", parse_dates=["OrderDate"])
-df = df.merge(
-    orders[["ProductionOrderID","OrderDate","PlannedQty"]],
-    on="ProductionOrderID",
-    how="left"
-)
+    # 2. Bring in order-level features (OrderDate, PlannedQty): a left join by
+    #    looking every event's order up in the in-memory order index
+    orders = load_orders() if orders is None else orders
+    matched = orders.reindex(df["ProductionOrderID"].astype(str))
+    for c in ORDER_COLUMNS:
+        df[c] = matched[c].to_numpy()
+    # IDs and labels as categories, measures at their compact widths (see schema.py)
+    compact(df, "NAL" if nal is None else None)
 
-# 3. Sanity check: these columns must now exist
-#    • PlantID     (comes from NAL.csv)
-#    • MachineClass (comes from NAL.csv)
-#    • ProductComplexity (comes from NAL.csv)
-#    • OrderDate, PlannedQty (we just merged)
+    # 3. Sanity check: these columns must now exist
+    #    • PlantID     (comes from NAL.csv)
+    #    • MachineClass (comes from NAL.csv)
+    #    • ProductComplexity (comes from NAL.csv)
+    #    • OrderDate, PlannedQty (we just merged)
+
+    missing = [c for c in ["PlantID","MachineClass","ProductComplexity","OrderDate","PlannedQty"] if c not in df.columns]
+    if missing:
+        raise RuntimeError(f"Required columns missing: {missing}")
+    return df
 
-missing = [c for c in ["PlantID","MachineClass","ProductComplexity","OrderDate","PlannedQty"] if c not in df.columns]
-if missing:
-    raise RuntimeError(f"Required columns missing: {missing}")
 
 # 4. Feature engineering
-df["Hour"]    = df.RecordDateTime.dt.hour
-df["Weekday"] = df.RecordDateTime.dt.weekday
-df["Month"]   = df.RecordDateTime.dt.month
-
-# Additional time-based features
-df["DayOfWeek"] = df.RecordDateTime.dt.day_name()
-df["IsWeekend"] = df.RecordDateTime.dt.weekday.isin([5, 6]).astype(int)
-
-# Shift classification
-def classify_shift(hour):
-    if 6 <= hour <= 14:
-        return "DAY"
-    elif 15 <= hour <= 22:
-        return "EVENING"
-    else:
-        return "NIGHT"
+DAY_NAMES = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
+SHIFTS = ONE_HOT["Shift"]
+# Shift code per hour of day: NIGHT 0-5, DAY 6-14, EVENING 15-22, NIGHT 23
+SHIFT_OF_HOUR = np.array([2, 0, 1, 2])[np.digitize(np.arange(24), [6, 15, 23])]
+
+def time_features(ts):
+    """
+    Calendar and shift features from one decomposition of a datetime column
+    into day and time-of-day integers. 1970-01-01 was a Thursday, so the
+    weekday (Monday = 0) is (days since epoch + 3) % 7. Missing timestamps
+    give missing features.
+    """
+    ns = ts.to_numpy(dtype="datetime64[ns]")
+    nat = np.isnat(ns)
+    ns = np.where(nat, np.datetime64(0, "ns"), ns)  # placeholder, masked out below
+    days = ns.astype("datetime64[D]")
+    hour = ((ns - days) // np.timedelta64(1, "h")).astype(np.int32)
+    weekday = ((days.astype(np.int64) + 3) % 7).astype(np.int32)
+    month = (days.astype("datetime64[M]").astype(np.int64) % 12 + 1).astype(np.int32)
+    day_of_week = pd.Categorical.from_codes(np.where(nat, -1, weekday), DAY_NAMES)
+    shift = pd.Categorical.from_codes(np.where(nat, -1, SHIFT_OF_HOUR[hour]), SHIFTS)
+    is_weekend = (weekday >= 5).astype(np.int64)
+    if nat.any():
+        hour, weekday, month = (np.where(nat, np.nan, a) for a in (hour, weekday, month))
+    return pd.DataFrame({
+        "Hour": hour,
+        "Weekday": weekday,
+        "Month": month,
+        "DayOfWeek": day_of_week,
+        "IsWeekend": is_weekend,
+        "Shift": shift,
+    }, index=ts.index)
 
-df["Shift"] = df["Hour"].apply(classify_shift)
+@feature("Hour", "Weekday", "Month", "DayOfWeek", "IsWeekend", "Shift", needs=["RecordDateTime"])
+def time_block(c):
+    return time_features(c["RecordDateTime"])
 
 # Operational efficiency features
-df["TotalOperationTime"] = df["SetupTime_Actual_min"] + df["RunTime_Actual_min"]
-df["SetupEfficiency"] = df["SetupTime_Planned_min"] / df["SetupTime_Actual_min"]
-df["RunEfficiency"] = df["RunTime_Planned_min"] / df["RunTime_Actual_min"]
+@feature("TotalOperationTime", needs=["SetupTime_Actual_min", "RunTime_Actual_min"])
+def total_operation_time(c):
+    return c["SetupTime_Actual_min"] + c["RunTime_Actual_min"]
+
+@feature("SetupEfficiency", needs=["SetupTime_Planned_min", "SetupTime_Actual_min"])
+def setup_efficiency(c):
+    return c["SetupTime_Planned_min"] / c["SetupTime_Actual_min"]
+
+@feature("RunEfficiency", needs=["RunTime_Planned_min", "RunTime_Actual_min"])
+def run_efficiency(c):
+    return c["RunTime_Planned_min"] / c["RunTime_Actual_min"]
 
 # Lot size variance
-df["LotSizeVariance"] = df["LotSize_Actual"] - df["LotSize_Planned"]
-df["LotSizeVariancePct"] = (df["LotSizeVariance"] / df["LotSize_Planned"]) * 100
+@feature("LotSizeVariance", needs=["LotSize_Actual", "LotSize_Planned"])
+def lot_size_variance(c):
+    return c["LotSize_Actual"] - c["LotSize_Planned"]
+
+@feature("LotSizeVariancePct", needs=["LotSizeVariance", "LotSize_Planned"])
+def lot_size_variance_pct(c):
+    return (c["LotSizeVariance"] / c["LotSize_Planned"]) * 100
 
 # Quality metrics
-df["ScrapRate"] = (df["ScrapQty"] / df["LotSize_Actual"]) * 100
-df["HasDowntime"] = (df["Downtime_min"] > 0).astype(int)
-df["HasScrap"] = (df["ScrapQty"] > 0).astype(int)
+@feature("ScrapRate", needs=["ScrapQty", "LotSize_Actual"])
+def scrap_rate(c):
+    return (c["ScrapQty"] / c["LotSize_Actual"]) * 100
+
+@feature("HasDowntime", needs=["Downtime_min"])
+def has_downtime(c):
+    return (c["Downtime_min"] > 0).astype(int)
+
+@feature("HasScrap", needs=["ScrapQty"])
+def has_scrap(c):
+    return (c["ScrapQty"] > 0).astype(int)
 
 # CAPACITY UTILIZATION FEATURES - Critical for production planning
 # Work center capacity utilization
-df["PlannedCapacityTime"] = df["SetupTime_Planned_min"] + df["RunTime_Planned_min"]
-df["ActualCapacityTime"] = df["SetupTime_Actual_min"] + df["RunTime_Actual_min"]
-df["CapacityUtilization"] = df["ActualCapacityTime"] / (df["ActualCapacityTime"] + df["Downtime_min"])
+@feature("PlannedCapacityTime", needs=["SetupTime_Planned_min", "RunTime_Planned_min"])
+def planned_capacity_time(c):
+    return c["SetupTime_Planned_min"] + c["RunTime_Planned_min"]
+
+@feature("ActualCapacityTime", needs=["SetupTime_Actual_min", "RunTime_Actual_min"])
+def actual_capacity_time(c):
+    return c["SetupTime_Actual_min"] + c["RunTime_Actual_min"]
+
+@feature("CapacityUtilization", needs=["ActualCapacityTime", "Downtime_min"])
+def capacity_utilization(c):
+    return c["ActualCapacityTime"] / (c["ActualCapacityTime"] + c["Downtime_min"])
 
 # Theoretical vs actual capacity consumption
-df["TheoreticalCapacity"] = df["PlannedCapacityTime"] 
-df["ActualCapacityConsumption"] = df["ActualCapacityTime"] + df["Downtime_min"]
-df["CapacityOverrun"] = df["ActualCapacityConsumption"] - df["TheoreticalCapacity"]
-df["CapacityOverrunPct"] = (df["CapacityOverrun"] / df["TheoreticalCapacity"]) * 100
+@feature("TheoreticalCapacity", needs=["PlannedCapacityTime"])
+def theoretical_capacity(c):
+    return c["PlannedCapacityTime"]
+
+@feature("ActualCapacityConsumption", needs=["ActualCapacityTime", "Downtime_min"])
+def actual_capacity_consumption(c):
+    return c["ActualCapacityTime"] + c["Downtime_min"]
+
+@feature("CapacityOverrun", needs=["ActualCapacityConsumption", "TheoreticalCapacity"])
+def capacity_overrun(c):
+    return c["ActualCapacityConsumption"] - c["TheoreticalCapacity"]
+
+@feature("CapacityOverrunPct", needs=["CapacityOverrun", "TheoreticalCapacity"])
+def capacity_overrun_pct(c):
+    return (c["CapacityOverrun"] / c["TheoreticalCapacity"]) * 100
 
 # Production rate and throughput
-df["ProductionRate"] = df["LotSize_Actual"] / df["ActualCapacityTime"]  # units per minute
-df["PlannedProductionRate"] = df["LotSize_Planned"] / df["PlannedCapacityTime"]
-df["ThroughputEfficiency"] = df["ProductionRate"] / df["PlannedProductionRate"]
+@feature("ProductionRate", needs=["LotSize_Actual", "ActualCapacityTime"])
+def production_rate(c):
+    return c["LotSize_Actual"] / c["ActualCapacityTime"]  # units per minute
+
+@feature("PlannedProductionRate", needs=["LotSize_Planned", "PlannedCapacityTime"])
+def planned_production_rate(c):
+    return c["LotSize_Planned"] / c["PlannedCapacityTime"]
+
+@feature("ThroughputEfficiency", needs=["ProductionRate", "PlannedProductionRate"])
+def throughput_efficiency(c):
+    return c["ProductionRate"] / c["PlannedProductionRate"]
 
 # Bottleneck indicators
-df["IsBottleneck"] = (df["CapacityUtilization"] > 0.85).astype(int)  # High utilization = potential bottleneck
-df["CapacityStress"] = df["CapacityUtilization"] * df["ProductComplexity"].map({"LOW": 1, "MED": 1.5, "HIGH": 2})
+@feature("IsBottleneck", needs=["CapacityUtilization"])
+def is_bottleneck(c):
+    return (c["CapacityUtilization"] > 0.85).astype(int)  # High utilization = potential bottleneck
+
+@feature("CapacityStress", needs=["CapacityUtilization", "ProductComplexity"])
+def capacity_stress(c):
+    return c["CapacityUtilization"] * c["ProductComplexity"].map({"LOW": 1, "MED": 1.5, "HIGH": 2}).astype(float)
+
+
+def plan_features(names):
+    """Nodes needed for the named features, each after the nodes it depends on."""
+    order, seen = [], set()
+
+    def visit(name):
+        node = FEATURES.get(name)
+        if node is None or node in seen:
+            return  # an input column, or already planned
+        seen.add(node)
+        for need in node.needs:
+            visit(need)
+        order.append(node)
+
+    for name in names:
+        visit(name)
+    return order
+
+
+def build_features(df, names=None):
+    """
+    Add the named features (default: all) to df, computing only the nodes
+    they need. Intermediates nobody asked for are dropped as soon as their
+    last consumer has run. Returns (df, seconds per node).
+    """
+    names = list(FEATURES) if names is None else list(names)
+    unknown = [n for n in names if n not in FEATURES and n not in df.columns]
+    if unknown:
+        raise ValueError(f"Unknown feature(s) {unknown}; expected one of {list(FEATURES)}")
+    wanted = set(names)
+    plan = plan_features(names)
+    pending = Counter(need for node in plan for need in node.needs)
+    values, timings = {}, {}
+    cols = ChainMap(values, df)
+    for node in plan:
+        start = time.perf_counter()
+        out = node.fn(cols)
+        timings[", ".join(node.names)] = time.perf_counter() - start
+        values.update(out.items() if isinstance(out, pd.DataFrame) else {node.names[0]: out})
+        for need in node.needs:
+            pending[need] -= 1
+            if not pending[need] and need in values and need not in wanted:
+                del values[need]
+    new = pd.DataFrame({n: values[n] for n in FEATURES if n in wanted}, index=df.index)
+    return pd.concat([df, new], axis=1), pd.Series(timings, name="seconds")
+
+
+def one_hot(df):
+    """One-hot encode the ONE_HOT columns present, against the fixed vocabulary."""
+    columns = [c for c in ONE_HOT if c in df.columns]
+    for c in columns:
+        df[c] = pd.Categorical(df[c], categories=ONE_HOT[c])
+    return pd.get_dummies(df, columns=columns, drop_first=True)
+
+
+def model_ready_frame(df, features=None):
+    """Features and target filter for a frame of loaded events; categorical columns stay as they are."""
+    df, timings = build_features(df, features)
 
-# Keep raw data with outliers, missing values, and errors for realistic ML work
-# This allows for proper data cleaning, outlier detection, and imputation practice
+    # Keep raw data with outliers, missing values, and errors for realistic ML work
+    # This allows for proper data cleaning, outlier detection, and imputation practice
 
-# 5. One-hot encode only the columns we know are present
-df = pd.get_dummies(
-    df,
-    columns=["ProductComplexity","MachineClass","PlantID","Shift","DowntimeReason"],
-    drop_first=True
-)
+    # 5. (Optional) drop rows missing your target, if you like
+    df = df.dropna(subset=["RunTime_Actual_min"])
+    return df, timings
 
-# 6. (Optional) drop rows missing your target, if you like
-df = df.dropna(subset=["RunTime_Actual_min"])
 
-# 7. Persist the final model-ready table
-df.to_csv("out/model_ready.csv", index=False)
-print(f"model_ready.csv written | rows={len(df):,} | cols={df.shape[1]}")
+def model_ready_table(df, features=None):
+    """model_ready_frame with the ONE_HOT columns one-hot encoded, as in out/model_ready."""
+    df, timings = model_ready_frame(df, features)
+
+    # 6. One-hot encode only the columns we know are present
+    return one_hot(df), timings
+
+
+def _npy_header(version, shape, dtype):
+    npy, buf = np.lib.format, io.BytesIO()
+    header = {"descr": npy.dtype_to_descr(dtype), "fortran_order": False, "shape": shape}
+    (npy.write_array_header_1_0 if version == (1, 0) else npy.write_array_header_2_0)(buf, header)
+    return buf.getvalue()
+
+
+def append_npy(path, arr):
+    """
+    Append rows to a C-order .npy file, creating it if missing. The rows go
+    after the last one the header counts, then the header is rewritten in
+    place; np.save pads it so the row count can grow.
+    """
+    arr = np.ascontiguousarray(arr)
+    if not path.exists():
+        np.save(path, arr)
+        return
+    npy = np.lib.format
+    with open(path, "r+b") as f:
+        version = npy.read_magic(f)
+        read_header = npy.read_array_header_1_0 if version == (1, 0) else npy.read_array_header_2_0
+        shape, fortran_order, dtype = read_header(f)
+        if fortran_order or dtype != arr.dtype or shape[1:] != arr.shape[1:]:
+            raise ValueError(f"Cannot append {arr.dtype} rows of shape {arr.shape[1:]} to {path}")
+        data_start = f.tell()
+        header = _npy_header(version, (shape[0] + len(arr), *shape[1:]), dtype)
+        if len(header) != data_start:
+            raise ValueError(f"The header of {path} cannot grow in place; rebuild it")
+        f.seek(data_start + shape[0] * dtype.itemsize * int(np.prod(shape[1:])))
+        f.write(arr.tobytes())
+        f.truncate()
+        f.seek(0)
+        f.write(header)
+
+
+class MatrixWriter:
+    """
+    Write model-ready frames (see model_ready_frame) as a numeric matrix
+    under out/model_ready_matrix, block by block:
+      numeric.npy         float32 rows × measures and features
+      codes.npy           int32 rows × categorical columns, -1 where missing
+      onehot_indptr.npy,  CSR one-hot of the ONE_HOT columns, first category
+      onehot_indices.npy  dropped like in the table (values are all 1)
+      <key>.npy           EventID and the datetime columns, unchanged
+      manifest.json       column order, numeric dtypes, categories, one-hot names
+    ONE_HOT columns are coded against their fixed vocabulary; the categories
+    of other columns grow as new values appear, so earlier codes stay valid.
+    With append=True an existing matrix is extended.
+    """
+
+    def __init__(self, path=MATRIX_DIR, append=False):
+        self.path = Path(path)
+        self.manifest_path = self.path / "manifest.json"
+        if append and self.manifest_path.exists():
+            self.manifest = json.loads(self.manifest_path.read_text())
+        else:
+            self.manifest = None
+            self.path.mkdir(parents=True, exist_ok=True)
+            for old in [*self.path.glob("*.npy"), self.manifest_path]:
+                old.unlink(missing_ok=True)
+
+    def _start(self, df):
+        keys = [c for c in df.columns if c == "EventID" or df[c].dtype.kind == "M"]
+        numeric = [c for c in df.columns if c not in keys and df[c].dtype.kind in "biuf"]
+        coded = [c for c in df.columns if c not in keys and c not in numeric]
+        return {
+            "rows": 0,
+            "nnz": 0,
+            "columns": list(df.columns),
+            "keys": keys,
+            "numeric": {c: str(df[c].dtype) for c in numeric},
+            "categories": {c: list(ONE_HOT.get(c, [])) for c in coded},
+            "onehot": [f"{c}_{v}" for c in ONE_HOT if c in coded for v in ONE_HOT[c][1:]],
+        }
+
+    def write(self, df):
+        if self.manifest is None:
+            self.manifest = self._start(df)
+        m = self.manifest
+        if list(df.columns) != m["columns"]:
+            raise ValueError(f"Columns differ from the matrix in {self.path}; rebuild it")
+        for c in m["numeric"]:
+            if df[c].dtype.kind == "f":
+                m["numeric"][c] = "float32"  # what numeric.npy holds
+
+        codes = np.empty((len(df), len(m["categories"])), dtype=np.int32)
+        for j, (c, vocab) in enumerate(m["categories"].items()):
+            cat = pd.Categorical(df[c])
+            values = cat.categories.astype(str)
+            if c not in ONE_HOT:
+                vocab.extend(values[~values.isin(vocab)].tolist())
+            lookup = np.append(pd.Index(vocab).get_indexer(values), -1)
+            codes[:, j] = lookup[cat.codes]  # code -1 picks the appended -1
+
+        # One-hot entries in row order; within a row, columns ascend in ONE_HOT order
+        rows, cols, offset = [np.empty(0, np.int64)], [np.empty(0, np.int64)], 0
+        coded = list(m["categories"])
+        for c in ONE_HOT:
+            if c in coded:
+                j = coded.index(c)
+                hit = np.flatnonzero(codes[:, j] >= 1)
+                rows.append(hit)
+                cols.append(offset + codes[hit, j] - 1)
+                offset += len(ONE_HOT[c]) - 1
+        rows, cols = np.concatenate(rows), np.concatenate(cols)
+        order = np.argsort(rows, kind="stable")
+        indptr = m["nnz"] + np.cumsum(np.bincount(rows, minlength=len(df)), dtype=np.int64)
+        if not (self.path / "onehot_indptr.npy").exists():
+            indptr = np.concatenate([[m["nnz"]], indptr])
+
+        append_npy(self.path / "numeric.npy", df[list(m["numeric"])].to_numpy(dtype=np.float32))
+        append_npy(self.path / "codes.npy", codes)
+        append_npy(self.path / "onehot_indptr.npy", indptr)
+        append_npy(self.path / "onehot_indices.npy", cols[order])
+        for c in m["keys"]:
+            append_npy(self.path / f"{c}.npy", df[c].to_numpy())
+        m["rows"] += len(df)
+        m["nnz"] += len(cols)
+        self.manifest_path.write_text(json.dumps(m, indent=2))
+        return m["rows"]
+
+
+class FeatureMatrix:
+    """A matrix written by MatrixWriter; arrays are memory-mapped unless mmap_mode=None."""
+
+    def __init__(self, manifest, numeric, codes, onehot, keys):
+        self.manifest = manifest
+        self.numeric = numeric
+        self.codes = codes
+        self.onehot = onehot
+        self.keys = keys
+
+    def __len__(self):
+        return self.manifest["rows"]
+
+    @classmethod
+    def load(cls, path=MATRIX_DIR, mmap_mode="r"):
+        path = Path(path)
+        manifest = json.loads((path / "manifest.json").read_text())
+
+        def load(name):
+            return np.load(path / f"{name}.npy", mmap_mode=mmap_mode)
+
+        indices = load("onehot_indices")
+        onehot = sp.csr_matrix((np.ones(len(indices), dtype=np.int8), indices, load("onehot_indptr")),
+                               shape=(manifest["rows"], len(manifest["onehot"])))
+        keys = {c: load(c) for c in manifest["keys"]}
+        return cls(manifest, load("numeric"), load("codes"), onehot, keys)
+
+    def frame(self):
+        """All columns as a DataFrame (a copy), categorical columns as pandas categoricals."""
+        cols = dict(self.keys)
+        for j, (c, dtype) in enumerate(self.manifest["numeric"].items()):
+            cols[c] = self.numeric[:, j].astype(dtype)
+        for j, (c, categories) in enumerate(self.manifest["categories"].items()):
+            cols[c] = pd.Categorical.from_codes(self.codes[:, j], categories)
+        return pd.DataFrame({c: cols[c] for c in self.manifest["columns"]})
+
+
+def write_chunked(fmt="csv", chunk_size=500_000, features=None):
+    """
+    Out-of-core build: stream the NAL in chunks, join each against the
+    in-memory orders, compute its features and write it (table and matrix)
+    out before reading the next, so peak memory follows the chunk size.
+    Measures are read as float (float32 once compacted) so every chunk has
+    the same schema. Returns (rows, seconds per node).
+    """
+    orders = load_orders()
+    matrix = MatrixWriter()
+    timings = None
+    # Flush a row group per chunk rather than buffering up to ROW_GROUP_SIZE rows
+    with TableWriter(table_path("model_ready", fmt), fmt, row_group_size=chunk_size) as writer:
+        for nal in iter_table("NAL", chunk_size, parse_dates=["RecordDateTime"],
+                              dtype=dict.fromkeys(NAL_TEXT_COLUMNS, object)):
+            measures = [c for c, t in nal.dtypes.items() if t.kind in "iuf" and c != "EventID"]
+            nal = nal.astype(dict.fromkeys(measures, "float64"))
+            df, chunk_timings = model_ready_frame(load_events(nal, orders), features)
+            matrix.write(df)
+            writer.write(one_hot(df))
+            timings = chunk_timings if timings is None else timings + chunk_timings
+    return writer.rows, timings
+
+
+def read_new_events(path, offset=0, float_columns=()):
+    """
+    NAL rows of a CSV from byte `offset` (0: after the header) to the end,
+    and the byte offset after the last one parsed. Text columns are read as
+    text even if this stretch has no values in them, and `float_columns` as
+    float even if it has no missing values, so appended rows are formatted
+    like the earlier ones.
+    """
+    dtype = {**dict.fromkeys(NAL_TEXT_COLUMNS, object),
+             **dict.fromkeys([c for c in float_columns if c not in NAL_TEXT_COLUMNS], float)}
+    with open(path, "rb") as f:
+        header = f.readline()
+        f.seek(max(offset, len(header)))
+        try:
+            nal = pd.read_csv(f, header=None, names=header.decode().strip().split(","),
+                              parse_dates=["RecordDateTime"], dtype=dtype)
+        except pd.errors.EmptyDataError:
+            nal = pd.DataFrame(columns=header.decode().strip().split(","))
+        return nal, f.tell()
+
+
+def tail_digest(path, offset):
+    """SHA-256 of the TAIL_BYTES before `offset`; changes if those rows were rewritten."""
+    with open(path, "rb") as f:
+        f.seek(max(offset - TAIL_BYTES, 0))
+        return hashlib.sha256(f.read(min(offset, TAIL_BYTES))).hexdigest()
+
+
+def update_incremental(features=None):
+    """
+    Append model-ready rows for NAL events added since the last run to
+    out/model_ready.csv and its matrix. The watermark file records how far
+    out/NAL.csv was processed (byte offset, rows, last EventID/RecordDateTime).
+    If the NAL, the store or the matrix was rewritten since, everything is
+    rebuilt.
+    Returns (rows appended, watermark).
+    """
+    source, store = resolve_table("NAL"), table_path("model_ready", "csv")
+    if source.suffix != ".csv":
+        raise ValueError(f"Incremental mode reads an appendable out/NAL.csv, not {source}")
+    state = json.loads(WATERMARK_PATH.read_text()) if WATERMARK_PATH.exists() else None
+    manifest = MATRIX_DIR / "manifest.json"
+    resume = (state is not None and state["source"] == str(source) and store.exists()
+              and store.stat().st_size == state["store_size"]
+              and manifest.exists() and json.loads(manifest.read_text())["rows"] == state.get("store_rows")
+              and source.stat().st_size >= state["offset"]
+              and tail_digest(source, state["offset"]) == state["tail_sha256"])
+    if not resume:
+        state = {"source": str(source), "offset": 0, "rows": 0, "store_rows": 0, "float_columns": None,
+                 "last_event_id": None, "last_record_datetime": None}
+
+    nal, offset = read_new_events(source, state["offset"], state["float_columns"] or ())
+    if state["float_columns"] is None:
+        state["float_columns"] = [c for c, t in nal.dtypes.items()
+                                  if t.kind == "f" and c not in NAL_TEXT_COLUMNS]
+    appended = 0
+    if len(nal) or not resume:
+        df, _ = model_ready_frame(load_events(nal), features)
+        table = one_hot(df)
+        if resume:
+            with open(store) as f:
+                columns = f.readline().strip().split(",")
+            if list(table.columns) != columns:
+                raise ValueError(f"New rows have different columns than {store}; rebuild without --incremental")
+        MatrixWriter(append=resume).write(df)
+        with TableWriter(store, "csv", append=resume) as writer:
+            writer.write(table)
+        appended = writer.rows
+    if len(nal):
+        last = nal.iloc[-1]
+        state.update(last_event_id=int(last["EventID"]) if "EventID" in nal else None,
+                     last_record_datetime=str(last["RecordDateTime"]))
+    state.update(offset=offset, rows=state["rows"] + len(nal), store_rows=state["store_rows"] + appended,
+                 tail_sha256=tail_digest(source, offset), store_size=store.stat().st_size)
+    WATERMARK_PATH.write_text(json.dumps(state, indent=2))
+    return appended, state
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build the model-ready feature table from NAL events.")
+    parser.add_argument("--features", nargs="+", metavar="NAME",
+                        help="only compute these features (and what they depend on)")
+    parser.add_argument("--timings", action="store_true", help="print compute time per feature")
+    parser.add_argument("--incremental", action="store_true",
+                        help="only process NAL rows appended since the last --incremental run (CSV)")
+    parser.add_argument("--chunk-size", type=int, default=0,
+                        help="stream the NAL in chunks of this many rows (0: load it whole)")
+    add_format_argument(parser)
+    args = parser.parse_args()
+
+    if args.incremental and args.chunk_size:
+        parser.error("--incremental and --chunk-size are separate modes")
+    if args.incremental:
+        if args.format != "csv":
+            parser.error("--incremental appends to out/model_ready.csv; use --format csv")
+        appended, state = update_incremental(args.features)
+        print(f"model_ready.csv updated | new rows={appended:,} | NAL rows processed={state['rows']:,} "
+              f"| watermark={state['last_record_datetime']}")
+    elif args.chunk_size:
+        rows, timings = write_chunked(args.format, args.chunk_size, args.features)
+        print(f"model_ready.{args.format} written in chunks of {args.chunk_size:,} | rows={rows:,}")
+        if args.timings:
+            print(timings.sort_values(ascending=False).to_string(float_format="{:.4f}".format))
+    else:
+        df, timings = model_ready_frame(load_events(), args.features)
+        MatrixWriter().write(df)
+        df = one_hot(df)
+
+        # 7. Persist the final model-ready table
+        write_table(df, "model_ready", args.format)
+        print(f"model_ready.{args.format} written | rows={len(df):,} | cols={df.shape[1]}")
+        print(f"matrix → {MATRIX_DIR}/ (numeric, category codes, sparse one-hot, manifest.json)")
+        if args.timings:
+            print(timings.sort_values(ascending=False).to_string(float_format="{:.4f}".format))
@@ -1,149 +1,449 @@
 # nal.py (Retrofitted Final Time Series Generator with OperatorID)
 
+import argparse
+import os
 import pandas as pd
 import numpy as np
 import random
-from datetime import timedelta
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 
+from dirty_data import inject, load_spec
+from routing_index import RoutingIndex
+from schema import compact, merge_bounds, numeric_bounds, stream_dtypes
+from table_io import OUT_DIR, TableWriter, add_format_argument, read_table, table_path, write_table
+
 # Config
 SEED = 13
 NUM_RECORDS = 50000
-np.random.seed(SEED)
-rng = np.random.default_rng(SEED)
-random.seed(SEED)
 
 # Operator pool
-OP_IDS = [f"OP{str(i).zfill(3)}" for i in range(1, 61)]
-
-# Load master data
-mm = pd.read_csv("out/material_master.csv")
-routings = pd.read_csv("out/routing_table.csv")
-orders = pd.read_csv("out/production_orders.csv")
-
-# Only use FGs for production
-fg_materials = mm[mm.MaterialType == "FG"]
-routings_fg = routings[routings.MaterialNumber.isin(fg_materials.MaterialNumber)]
-
-# Generate records with realistic timing
-records = []
-order_timestamps = {}  # Track last timestamp for each order to ensure realistic sequencing
-
-for i in range(NUM_RECORDS):
-    order = orders.sample(1).iloc[0]
-    mat = mm[mm.MaterialNumber == order.MaterialNumber].iloc[0]
-    routing_subset = routings_fg[routings_fg.MaterialNumber == mat.MaterialNumber]
-    if routing_subset.empty:
-        continue
-    op = routing_subset.sample(1).iloc[0]  # pick one routing step
-    
-    # Create more realistic timestamps with random minutes and seconds
-    base_timestamp = pd.to_datetime(order.OrderDate) + timedelta(hours=int(rng.integers(0, 720)))
-    # Add random minutes (0-59) and seconds (0-59)
-    random_minutes = int(rng.integers(0, 60))
-    random_seconds = int(rng.integers(0, 60))
-    timestamp = base_timestamp + timedelta(minutes=random_minutes, seconds=random_seconds)
-    
-    # Add realistic work shift patterns (slightly favor day shifts)
-    hour = timestamp.hour
-    weekday = timestamp.weekday()  # 0=Monday, 6=Sunday
-    
-    # Weekend operations reduced (but not eliminated for 24/7 operations)
-    if weekday >= 5:  # Saturday or Sunday
-        if rng.random() < 0.4:  # 40% chance to skip weekend operations
-            continue
-    
-    # Night shift operations reduced
-    if hour < 6 or hour > 22:  # Night shift - reduce probability
-        if rng.random() < 0.3:  # 30% chance to skip night operations
-            continue
-    elif 6 <= hour <= 14:  # Day shift - normal operations
-        pass
-    elif 14 <= hour <= 22:  # Evening shift - normal operations
-        pass
-    
-    # Ensure sequential operations for the same order have realistic time gaps
-    order_id = order.ProductionOrderID
-    if order_id in order_timestamps:
-        # Add realistic gap based on actual operation duration
-        last_timestamp = order_timestamps[order_id]
-        # Gap = previous operation duration + changeover + transport + buffer
-        realistic_gap = timedelta(
-            minutes=int(setup_act + run_act + changeover_time + transport_time + int(rng.integers(0, 30)))
-        )
-        if timestamp <= last_timestamp + realistic_gap:
-            timestamp = last_timestamp + realistic_gap
-    
-    order_timestamps[order_id] = timestamp
+OP_IDS = np.array([f"OP{str(i).zfill(3)}" for i in range(1, 61)])
+DOWNTIME_REASONS = np.array(["MECH", "ELEC", "QC", "MATL", None], dtype=object)
+DOWNTIME_P = [.3, .2, .1, .1, .3]
+# Text columns stay text in spilled runs even when a block is all-null,
+# so every merge block has the same schema
+RUN_DTYPES = {c: object for c in [
+    "ProductionOrderID", "PlantID", "WorkCenterID", "MachineClass", "OperatorID",
+    "MaterialNumber", "MaterialName", "ProductComplexity", "DowntimeReason",
+]}
+MERGE_FAN_IN = 64  # run files open at once in one merge pass
+GLITCH_COLS = [
+    "SetupTime_Planned_min", "SetupTime_Actual_min",
+    "RunTime_Planned_min",    "RunTime_Actual_min"
+]
+
+
+def load_master_data():
+    mm = read_table("material_master")
+    orders = read_table("production_orders", parse_dates=["OrderDate"])
+
+    # Only use FGs for production
+    fg_materials = mm[mm.MaterialType == "FG"]
+    routing_index = RoutingIndex.from_table(materials=fg_materials.MaterialNumber)
+    return mm, routing_index, orders
+
+
+def new_order_state(n_orders):
+    """Per-order sequencing state carried across chunks: last start time and duration."""
+    return {
+        "last_ts": np.full(n_orders, np.iinfo(np.int64).min, dtype=np.int64),
+        "last_dur": np.zeros(n_orders),
+    }
+
+
+def sequence_orders(order_codes, timestamps, durations_min, buffer_min, state=None):
+    """
+    Push each event of an order to at least the previous event's end
+    (previous duration + changeover + transport + buffer), in draw order.
+
+    With gap g_k before the k-th event of an order and G its running sum,
+    t'_k = max(t_k, t'_(k-1) + g_k) = G_k + max(carry, cummax_j(t_j - G_j)),
+    so one stable sort by order plus groupby cumsum/cummax sequences all
+    orders in linear time. `state` (see new_order_state) is read as the
+    carry and updated with each order's last event.
+    """
+    n = len(order_codes)
+    if state is None:
+        state = new_order_state(int(order_codes.max()) + 1 if n else 0)
+    order = np.argsort(order_codes, kind="stable")
+    codes = order_codes[order]
+    ts = timestamps.astype("datetime64[ns]").astype(np.int64)[order]
+    dur = durations_min[order]
+
+    first = np.ones(n, dtype=bool)
+    first[1:] = codes[1:] != codes[:-1]
+    prev_dur = np.empty(n)
+    prev_dur[1:] = dur[:-1]
+    prev_dur[first] = state["last_dur"][codes[first]]
+    carry = state["last_ts"][codes]
+
+    gap_ns = np.floor(prev_dur + buffer_min[order]).astype(np.int64) * 60_000_000_000
+    cum_gap = pd.Series(gap_ns).groupby(codes, sort=False).cumsum().to_numpy()
+    lead = pd.Series(ts - cum_gap).groupby(codes, sort=False).cummax().to_numpy()
+    seq = cum_gap + np.maximum(lead, carry)
+
+    last = np.ones(n, dtype=bool)
+    last[:-1] = codes[:-1] != codes[1:]
+    state["last_ts"][codes[last]] = seq[last]
+    state["last_dur"][codes[last]] = dur[last]
+
+    out = np.empty(n, dtype=np.int64)
+    out[order] = seq
+    return out.astype("datetime64[ns]")
+
+
+def generate_events(n, rng, mm, routing_index, orders, order_state=None):
+    """
+    Draw n candidate events as whole arrays and return the kept ones as a
+    DataFrame (weekend/night thinning drops roughly a fifth of them).
+    """
+    # Orders and their materials
+    order_idx = rng.integers(0, len(orders), n)
+    ords = orders.iloc[order_idx].reset_index(drop=True)
+    mat = mm.set_index("MaterialNumber").reindex(ords.MaterialNumber).reset_index()
+
+    # One routing step per event, uniform over the material's operations
+    op_rows = routing_index.sample_ops(routing_index.codes(ords.MaterialNumber), rng)
+    has_routing = op_rows >= 0
+
+    # Realistic timestamps: order date + hours offset + random minutes and seconds
+    offset_s = (rng.integers(0, 720, n) * 3600
+                + rng.integers(0, 60, n) * 60
+                + rng.integers(0, 60, n))
+    timestamp = ords.OrderDate.to_numpy() + offset_s.astype("timedelta64[s]")
+    ts = pd.DatetimeIndex(timestamp)
+
+    # Weekend operations reduced (40% skipped), night shift reduced (30% skipped)
+    weekend_skip = (ts.weekday >= 5) & (rng.random(n) < 0.4)
+    night_skip = ((ts.hour < 6) | (ts.hour > 22)) & (rng.random(n) < 0.3)
+    keep = has_routing & ~weekend_skip & ~night_skip
+
+    ords, mat, timestamp = ords[keep], mat[keep], timestamp[keep]
+    order_codes = order_idx[keep]
+    op = routing_index.take(op_rows[keep])
+    m = int(keep.sum())
 
     # Plan vs actual with more realistic timing
-    setup_plan = np.clip(rng.normal(30, 10), 5, 120)
-    run_plan   = np.clip(rng.normal(300, 60), 30, 600)
-    setup_act  = setup_plan * rng.uniform(0.7, 1.5)
-    run_act    = run_plan   * rng.uniform(0.6, 1.7)
-    
-    # Add realistic changeover and transport time
-    changeover_time = int(rng.integers(10, 45))  # 10-45 minutes for changeover
-    transport_time = int(rng.integers(5, 20))    # 5-20 minutes for material transport
+    setup_plan = np.clip(rng.normal(30, 10, m), 5, 120)
+    run_plan   = np.clip(rng.normal(300, 60, m), 30, 600)
+    setup_act  = setup_plan * rng.uniform(0.7, 1.5, m)
+    run_act    = run_plan   * rng.uniform(0.6, 1.7, m)
+
+    # Realistic changeover (10-45 min) and transport (5-20 min) time
+    changeover_time = rng.integers(10, 45, m)
+    transport_time  = rng.integers(5, 20, m)
+
+    # Sequential operations for the same order keep realistic time gaps
+    if order_state is None:
+        order_state = new_order_state(len(orders))
+    timestamp = sequence_orders(
+        order_codes, timestamp,
+        setup_act + run_act + changeover_time + transport_time,
+        rng.integers(0, 30, m),
+        order_state,
+    )
 
     # Lot sizes and yield
-    lot_plan = rng.integers(50, 500)
-    lot_act  = max(1, round(lot_plan + rng.normal(0, 20)))
-    scrap    = rng.binomial(10, 0.1)
+    lot_plan = rng.integers(50, 500, m)
+    lot_act  = np.maximum(1, np.rint(lot_plan + rng.normal(0, 20, m))).astype(int)
+    scrap    = rng.binomial(10, 0.1, m)
 
-    records.append({
+    return pd.DataFrame({
         "RecordDateTime": timestamp,
-        "ProductionOrderID": order.ProductionOrderID,
-        "PlantID": order.PlantID,
-        "WorkCenterID": op.WorkCenter,
-        "MachineClass": op.MachineClass,
-        "OperatorID": rng.choice(OP_IDS),
-
-        "MaterialNumber": mat.MaterialNumber,
-        "MaterialName": mat.MaterialName,
-        "ProductComplexity": mat.ProductComplexity,
-
-        "OperationSeq": op.OperationSeq,
-        "SetupTime_Planned_min": round(setup_plan),
-        "RunTime_Planned_min": round(run_plan),
-        "SetupTime_Actual_min": round(setup_act),
-        "RunTime_Actual_min": round(run_act),
+        "ProductionOrderID": ords.ProductionOrderID.to_numpy(),
+        "PlantID": ords.PlantID.to_numpy(),
+        "WorkCenterID": op["WorkCenter"],
+        "MachineClass": op["MachineClass"],
+        "OperatorID": rng.choice(OP_IDS, m),
+
+        "MaterialNumber": mat.MaterialNumber.to_numpy(),
+        "MaterialName": mat.MaterialName.to_numpy(),
+        "ProductComplexity": mat.ProductComplexity.to_numpy(),
+
+        "OperationSeq": op["OperationSeq"],
+        "SetupTime_Planned_min": np.rint(setup_plan).astype(int),
+        "RunTime_Planned_min": np.rint(run_plan).astype(int),
+        "SetupTime_Actual_min": np.rint(setup_act).astype(int),
+        "RunTime_Actual_min": np.rint(run_act).astype(int),
 
         "LotSize_Planned": lot_plan,
         "LotSize_Actual": lot_act,
         "ScrapQty": scrap,
         "YieldRate_pct": (lot_act - scrap) / lot_plan * 100,
 
-        "Downtime_min": rng.poisson(5),
-        "DowntimeReason": rng.choice(["MECH", "ELEC", "QC", "MATL", None], p=[.3, .2, .1, .1, .3]),
+        "Downtime_min": rng.poisson(5, m),
+        "DowntimeReason": rng.choice(DOWNTIME_REASONS, m, p=DOWNTIME_P),
     })
 
-# Build DataFrame
-nal = pd.DataFrame(records)
 
-# Dirty-data injection
-nal.loc[rng.random(len(nal)) < 0.03, "OperatorID"] = None
-nal.loc[rng.random(len(nal)) < 0.03, "RunTime_Actual_min"] = np.nan
-nal.loc[rng.random(len(nal)) < 0.01, "RunTime_Actual_min"] *= 5
-bad_col = random.choice([
-    "SetupTime_Planned_min", "SetupTime_Actual_min",
-    "RunTime_Planned_min",    "RunTime_Actual_min"
-])
-nal.loc[rng.random(len(nal)) < 0.01, bad_col] *= 60
-
-# Maintenance injection
-nal["MaintenanceFlag"] = 0
-nal["MaintenanceType"] = None
-unique_wcs = nal.WorkCenterID.unique()
-for wc in unique_wcs:
-    wc_df = nal[nal.WorkCenterID == wc]
-    days = wc_df.RecordDateTime.dt.floor("D").drop_duplicates()
-    pm_days = days.sample(frac=0.05, random_state=SEED)
-    for day in pm_days:
-        mask = (nal.WorkCenterID == wc) & (nal.RecordDateTime.dt.floor("D") == day)
-        nal.loc[mask, ["MaintenanceFlag", "MaintenanceType", "Downtime_min"]] = [1, "PLANNED", 60]
-
-# Output
-Path("out").mkdir(exist_ok=True)
-nal.sort_values("RecordDateTime").to_csv("out/NAL.csv", index=False)
-print(f"✅ NAL.csv written | rows={len(nal):,} | glitch_col={bad_col}")
+def default_dirty_spec(bad_col):
+    """3% null operators, 3% missing run times, 1% ×5 outliers, 1% ×60 glitches on bad_col."""
+    return [
+        {"kind": "nulls", "column": "OperatorID", "rate": 0.03},
+        {"kind": "nulls", "column": "RunTime_Actual_min", "rate": 0.03},
+        {"kind": "outlier", "column": "RunTime_Actual_min", "rate": 0.01, "factor": 5},
+        {"kind": "unit_error", "column": bad_col, "rate": 0.01, "factor": 60},
+    ]
+
+
+def event_id_source(shard=0, n_shards=1):
+    """
+    fn(n) -> the next n EventIDs of one shard, interleaved across shards so
+    they are globally unique. Injected duplicate rows draw theirs from the
+    same source.
+    """
+    next_id = 0
+
+    def take(n):
+        nonlocal next_id
+        first, next_id = next_id, next_id + n
+        return shard + n_shards * np.arange(first, next_id, dtype=np.int64)
+    return take
+
+
+def add_event_ids(chunk, new_ids):
+    """Insert an EventID column drawn from new_ids (see event_id_source)."""
+    chunk.insert(0, "EventID", new_ids(len(chunk)))
+    return chunk
+
+
+def work_center_days(nal):
+    """Distinct (WorkCenterID, Day) pairs that have events."""
+    return pd.DataFrame({
+        "WorkCenterID": nal.WorkCenterID,
+        "Day": nal.RecordDateTime.dt.floor("D"),
+    }).drop_duplicates()
+
+
+def select_pm_days(wc_days, seed=SEED):
+    """
+    Sample 5% of each work center's active days for planned maintenance,
+    in one pass: rank the days of every work center by a random key and
+    keep the lowest round(5% × active days) ranks.
+    """
+    wc_days = wc_days.reset_index(drop=True)
+    wc = wc_days.WorkCenterID.to_numpy()
+    rank = pd.Series(np.random.default_rng(seed).random(len(wc_days))).groupby(wc).rank(method="first")
+    n_days = wc_days.groupby(wc).Day.transform("size")
+    return wc_days[rank.to_numpy() <= np.round(0.05 * n_days.to_numpy())]
+
+
+def _wc_day_key(work_centers, timestamps, wc_index):
+    """Single int64 key per (work center, calendar day); -1 for unknown work centers."""
+    day = np.asarray(timestamps, dtype="datetime64[ns]").astype("datetime64[D]").astype(np.int64)
+    wc_code = wc_index.get_indexer(work_centers)
+    return np.where(wc_code >= 0, wc_code * 1_000_000 + day, -1)
+
+
+def apply_maintenance(nal, pm_days):
+    """Flag every event on a (work center, PM day) with PLANNED maintenance and 60 min downtime."""
+    wc_index = pd.Index(pm_days.WorkCenterID.unique())
+    pm_keys = _wc_day_key(pm_days.WorkCenterID, pm_days.Day, wc_index)
+    mask = np.isin(_wc_day_key(nal.WorkCenterID, nal.RecordDateTime, wc_index), pm_keys)
+
+    nal["MaintenanceFlag"] = mask.astype(int)
+    nal["MaintenanceType"] = np.where(mask, "PLANNED", None)
+    nal.loc[mask, "Downtime_min"] = 60
+    return nal
+
+
+def write_batch(n_records, fmt, rng, dirty_spec, seed=SEED):
+    """Generate everything in memory, then sort and write once."""
+    mm, routing_index, orders = load_master_data()
+    new_ids = event_id_source()
+    nal = add_event_ids(generate_events(n_records, rng, mm, routing_index, orders), new_ids)
+    nal, labels = inject(nal, dirty_spec, rng, new_ids=new_ids)
+    apply_maintenance(nal, select_pm_days(work_center_days(nal), seed))
+    compact(nal, "NAL")
+    write_table(nal.sort_values("RecordDateTime"), "NAL", fmt)
+    write_table(labels, "NAL_dirty_labels", fmt)
+    return len(nal), len(labels)
+
+
+def _merged_blocks(run_paths, block_rows):
+    """
+    K-way merge of time-sorted run files, yielded block by block. Each round
+    emits every buffered row up to the smallest buffered tail timestamp, so
+    at most len(run_paths) * block_rows rows are in memory.
+    """
+    readers = [pd.read_csv(p, parse_dates=["RecordDateTime"], dtype=RUN_DTYPES, chunksize=block_rows)
+               for p in run_paths]
+    try:
+        buffers = {i: buf for i, r in enumerate(readers) if (buf := next(r, None)) is not None}
+        while buffers:
+            cutoff = min(buf.RecordDateTime.iloc[-1] for buf in buffers.values())
+            parts = []
+            for i in list(buffers):
+                buf = buffers[i]
+                n_take = buf.RecordDateTime.searchsorted(cutoff, side="right")
+                parts.append(buf.iloc[:n_take])
+                rest = buf.iloc[n_take:]
+                if rest.empty:
+                    rest = next(readers[i], None)
+                if rest is None:
+                    del buffers[i]
+                else:
+                    buffers[i] = rest
+            yield pd.concat(parts, ignore_index=True).sort_values("RecordDateTime", kind="stable")
+    finally:
+        for reader in readers:
+            reader.close()
+
+
+def merge_block_rows(chunk_size):
+    """Merge read size: a full fan-in of blocks holds about one chunk, whatever the run count."""
+    return max(1_000, chunk_size // MERGE_FAN_IN)
+
+
+def merge_runs(run_paths, fmt, pm_days, block_rows, spill_dir, dtypes=None):
+    """
+    Merge time-sorted run files into out/NAL.<fmt>, at most MERGE_FAN_IN
+    runs at a time. While more runs are left, each group of them is merged
+    into one longer run in spill_dir (and removed), so open files stay under
+    MERGE_FAN_IN and buffers under MERGE_FAN_IN * block_rows rows. Numeric
+    columns of every written block are cast to `dtypes` (see stream_dtypes).
+    """
+    run_paths, n_pass = list(run_paths), 0
+    while len(run_paths) > MERGE_FAN_IN:
+        merged = []
+        for start in range(0, len(run_paths), MERGE_FAN_IN):
+            group = run_paths[start:start + MERGE_FAN_IN]
+            path = Path(spill_dir) / f"merge_{n_pass:02}_{len(merged):05}.csv"
+            with TableWriter(path) as writer:
+                for block in _merged_blocks(group, block_rows):
+                    writer.write(block)
+            for run_path in group:
+                os.remove(run_path)
+            merged.append(path)
+        run_paths, n_pass = merged, n_pass + 1
+    with TableWriter(table_path("NAL", fmt), fmt) as writer:
+        for block in _merged_blocks(run_paths, block_rows):
+            apply_maintenance(block, pm_days)
+            writer.write(compact(block, dtypes=dtypes))
+
+
+def generate_runs(n_records, rng, dirty_spec, chunk_size, spill_dir, shard=0, n_shards=1):
+    """
+    Generate chunk_size candidate events at a time and spill each chunk as a
+    time-sorted run file. With n_shards > 1 only every n_shards-th order
+    (offset shard) is produced, so each order is sequenced within one shard.
+    Returns (run_paths, label file, active work-center days, rows, labels,
+    numeric bounds).
+    """
+    mm, routing_index, orders = load_master_data()
+    orders = orders.iloc[shard::n_shards]
+    order_state = new_order_state(len(orders))
+    run_paths, wc_days, bounds = [], None, {}
+    new_ids, n_rows = event_id_source(shard, n_shards), 0
+    label_path = Path(spill_dir) / f"labels_{shard:03}.csv"
+    with TableWriter(label_path) as labels:
+        for start in range(0, n_records, chunk_size):
+            chunk = generate_events(min(chunk_size, n_records - start), rng,
+                                    mm, routing_index, orders, order_state)
+            add_event_ids(chunk, new_ids)
+            chunk, chunk_labels = inject(chunk, dirty_spec, rng, new_ids=new_ids)
+            labels.write(chunk_labels)
+            # Deduplicate as we go: the distinct (work center, day) pairs stay bounded
+            wc_days = pd.concat([wc_days, work_center_days(chunk)]).drop_duplicates()
+            numeric_bounds(chunk, bounds)
+            run_path = Path(spill_dir) / f"run_{shard:03}_{len(run_paths):05}.csv"
+            chunk.sort_values("RecordDateTime").to_csv(run_path, index=False)
+            run_paths.append(run_path)
+            n_rows += len(chunk)
+    return run_paths, label_path, wc_days, n_rows, labels.rows, bounds
+
+
+def generate_shard(shard, n_shards, n_records, seed_seq, dirty_spec, chunk_size, spill_dir):
+    """Process-pool entry point: one shard with its own random stream."""
+    rng = np.random.default_rng(seed_seq)
+    return generate_runs(n_records, rng, dirty_spec, chunk_size or max(n_records, 1),
+                         spill_dir, shard, n_shards)
+
+
+def collect_labels(label_paths, fmt, block_rows=1_000_000):
+    """Stream the per-shard dirty-data labels into out/NAL_dirty_labels.<fmt>."""
+    with TableWriter(table_path("NAL_dirty_labels", fmt), fmt) as writer:
+        for path in label_paths:
+            for block in pd.read_csv(path, dtype={"Injector": object, "Column": object},
+                                     chunksize=block_rows):
+                writer.write(block)
+
+
+def shard_budgets(n_records, n_orders, n_shards):
+    """Split the record budget in proportion to each shard's share of orders."""
+    orders_per_shard = np.array([len(range(s, n_orders, n_shards)) for s in range(n_shards)])
+    bounds = np.rint(np.cumsum(orders_per_shard) / n_orders * n_records).astype(int)
+    return np.diff(bounds, prepend=0).tolist()
+
+
+def write_streaming(n_records, fmt, rng, dirty_spec, chunk_size, seed=SEED):
+    """
+    Spill time-sorted runs of chunk_size candidate events, then merge them
+    into out/NAL.<fmt>. Memory stays around one chunk no matter how many records
+    are requested: active work-center days are deduplicated per chunk and
+    the merge reads a bounded number of runs at a time.
+    """
+    with tempfile.TemporaryDirectory(prefix=".nal_runs_", dir=OUT_DIR) as spill_dir:
+        run_paths, label_path, wc_days, n_rows, n_labels, bounds = generate_runs(
+            n_records, rng, dirty_spec, chunk_size, spill_dir)
+        pm_days = select_pm_days(wc_days, seed)
+        merge_runs(run_paths, fmt, pm_days, merge_block_rows(chunk_size), spill_dir,
+                   stream_dtypes(bounds))
+        collect_labels([label_path], fmt)
+    return n_rows, n_labels
+
+
+def write_sharded(n_records, fmt, seed, dirty_spec, workers, chunk_size=None):
+    """
+    Split the record budget across a process pool. Shard streams are spawned
+    from the master seed, so output is reproducible per (seed, workers).
+    """
+    n_orders = len(read_table("production_orders", columns=["ProductionOrderID"]))
+    budgets = shard_budgets(n_records, n_orders, workers)
+    seed_seqs = np.random.SeedSequence(seed).spawn(workers)
+    with tempfile.TemporaryDirectory(prefix=".nal_runs_", dir=OUT_DIR) as spill_dir:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            shards = list(pool.map(
+                generate_shard, range(workers), [workers] * workers, budgets, seed_seqs,
+                [dirty_spec] * workers, [chunk_size] * workers, [spill_dir] * workers,
+            ))
+        run_paths = [p for paths, *_ in shards for p in paths]
+        wc_days = pd.concat([shard[2] for shard in shards]).drop_duplicates()
+        pm_days = select_pm_days(wc_days, seed)
+        merge_runs(run_paths, fmt, pm_days, merge_block_rows(chunk_size or max(budgets)), spill_dir,
+                   stream_dtypes(merge_bounds(*(shard[5] for shard in shards))))
+        collect_labels([shard[1] for shard in shards], fmt)
+    return sum(shard[3] for shard in shards), sum(shard[4] for shard in shards)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate the NAL event log (out/NAL.csv or .parquet).")
+    parser.add_argument("--records", type=int, default=NUM_RECORDS,
+                        help="candidate events to draw (about 80%% are kept)")
+    parser.add_argument("--chunk-size", type=int, default=None,
+                        help="stream in chunks of this many candidate events with bounded memory")
+    parser.add_argument("--workers", type=int, default=1,
+                        help=f"generate shards in this many processes (this host has {os.cpu_count()})")
+    parser.add_argument("--seed", type=int, default=SEED)
+    parser.add_argument("--dirty-spec", default=None,
+                        help="JSON list of dirty-data injections (see dirty_data.load_spec)")
+    add_format_argument(parser)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    random.seed(args.seed)
+    bad_col = random.choice(GLITCH_COLS)
+    dirty_spec = load_spec(args.dirty_spec) if args.dirty_spec else default_dirty_spec(bad_col)
+    OUT_DIR.mkdir(exist_ok=True)
+    if args.workers > 1:
+        n_rows, n_labels = write_sharded(args.records, args.format, args.seed, dirty_spec,
+                                         args.workers, args.chunk_size)
+    elif args.chunk_size:
+        n_rows, n_labels = write_streaming(args.records, args.format, rng, dirty_spec,
+                                           args.chunk_size, args.seed)
+    else:
+        n_rows, n_labels = write_batch(args.records, args.format, rng, dirty_spec, args.seed)
+    glitch = f"glitch_col={bad_col}" if not args.dirty_spec else f"spec={args.dirty_spec}"
+    print(f"✅ NAL.{args.format} written | rows={n_rows:,} | dirty labels={n_labels:,} | {glitch}")
@@ -1,8 +1,11 @@
 # routing_generator.py
 
+import argparse
 import pandas as pd
 import numpy as np
-from pathlib import Path
+
+from schema import compact
+from table_io import OUT_DIR, add_format_argument, read_table, read_table_at, write_table
 
 SEED = 42
 np.random.seed(SEED)
@@ -13,26 +16,36 @@ WC_LIST = [f"WC{str(i).zfill(2)}" for i in range(1, 21)]
 MACH_CLASSES = ["CNC", "PRESS", "MILL", "ROBOT", "GRIND"]
 
 
-def generate_routings(material_master_path="out/material_master.csv"):
-    mm = pd.read_csv(material_master_path)
-    routings = []
-    for _, row in mm.iterrows():
-        n_ops = rng.integers(1, 4)
-        ops = rng.choice(OP_SEQS, size=n_ops, replace=False)
-        ops.sort()
-        for op in ops:
-            routings.append({
-                "MaterialNumber": row["MaterialNumber"],
-                "OperationSeq": op,
-                "WorkCenter": rng.choice(WC_LIST),
-                "MachineClass": rng.choice(MACH_CLASSES),
-                "SetupTime_min": int(np.clip(rng.normal(30, 10), 5, 120)),
-                "RunTime_min": int(np.clip(rng.normal(300, 60), 30, 600))
-            })
-    return pd.DataFrame(routings)
+def generate_routings(material_master_path=None, mm=None):
+    """
+    1-3 operations per material, drawn for all materials at once: ranking
+    random keys per row and keeping ranks below n_ops picks distinct
+    OP_SEQS, which np.nonzero then returns in ascending order. Materials
+    come from `mm`, else the table at material_master_path, else
+    out/material_master.
+    """
+    if mm is None:
+        mm = read_table("material_master") if material_master_path is None else read_table_at(material_master_path)
+    n_ops = rng.integers(1, 4, len(mm))
+    ranks = rng.random((len(mm), len(OP_SEQS))).argsort(axis=1).argsort(axis=1)
+    material, op = np.nonzero(ranks < n_ops[:, None])
+    n = len(material)
+    return pd.DataFrame({
+        # Material numbers are unique in the master, so they serve as categories directly
+        "MaterialNumber": pd.Categorical.from_codes(material, mm["MaterialNumber"].to_numpy()),
+        "OperationSeq": np.array(OP_SEQS)[op],
+        "WorkCenter": pd.Categorical.from_codes(rng.integers(0, len(WC_LIST), n), WC_LIST),
+        "MachineClass": pd.Categorical.from_codes(rng.integers(0, len(MACH_CLASSES), n), MACH_CLASSES),
+        "SetupTime_min": np.clip(rng.normal(30, 10, n), 5, 120).astype(np.int64),
+        "RunTime_min": np.clip(rng.normal(300, 60, n), 30, 600).astype(np.int64),
+    })
 
 if __name__ == "__main__":
-    Path("out").mkdir(exist_ok=True)
-    df = generate_routings()
-    df.to_csv("out/routing_table.csv", index=False)
-    print(f"✅ routing_table.csv written | rows={len(df):,}")
+    parser = argparse.ArgumentParser(description="Generate routings for every material.")
+    add_format_argument(parser)
+    args = parser.parse_args()
+
+    OUT_DIR.mkdir(exist_ok=True)
+    df = compact(generate_routings(), "routing_table")
+    write_table(df, "routing_table", args.format)
+    print(f"✅ routing_table.{args.format} written | rows={len(df):,}")
@@ -0,0 +1,73 @@
+# routing_index.py
+
+import numpy as np
+import pandas as pd
+
+from table_io import read_table
+
+ROUTING_COLUMNS = ["OperationSeq", "WorkCenter", "MachineClass", "SetupTime_min", "RunTime_min"]
+
+
+class RoutingIndex:
+    """
+    Material → routing operations, built once from the routing table.
+    Operations of material code k live in rows offsets[k]:offsets[k+1]
+    of the contiguous column arrays, ordered by OperationSeq.
+    """
+
+    def __init__(self, routings):
+        codes, materials = pd.factorize(routings["MaterialNumber"].to_numpy(), sort=True)
+        order = np.lexsort((routings["OperationSeq"].to_numpy(), codes))
+        df, codes = routings.iloc[order], codes[order]
+        counts = np.bincount(codes, minlength=len(materials))
+
+        self.materials = pd.Index(materials, name="MaterialNumber")
+        self.offsets = np.zeros(len(materials) + 1, dtype=np.int64)
+        np.cumsum(counts, out=self.offsets[1:])
+        self.columns = {c: df[c].to_numpy() for c in ROUTING_COLUMNS}
+
+    @classmethod
+    def from_table(cls, materials=None):
+        """Load out/routing_table, optionally restricted to the given materials."""
+        routings = read_table("routing_table")
+        if materials is not None:
+            routings = routings[routings.MaterialNumber.isin(materials)]
+        return cls(routings)
+
+    def __len__(self):
+        return len(self.materials)
+
+    def codes(self, material_numbers):
+        """Integer codes for material numbers; -1 where a material has no routing."""
+        return self.materials.get_indexer(material_numbers)
+
+    def op_counts(self):
+        """Number of operations per material, as a Series indexed by MaterialNumber."""
+        return pd.Series(np.diff(self.offsets), index=self.materials, name="Operation_Count")
+
+    def operations(self, material_number):
+        """All operations of one material as a DataFrame (empty if it has no routing)."""
+        k = self.materials.get_indexer([material_number])[0]
+        if k < 0:
+            return pd.DataFrame(columns=["MaterialNumber"] + ROUTING_COLUMNS)
+        rows = slice(self.offsets[k], self.offsets[k + 1])
+        df = pd.DataFrame({c: arr[rows] for c, arr in self.columns.items()})
+        df.insert(0, "MaterialNumber", material_number)
+        return df
+
+    def sample_ops(self, codes, rng):
+        """
+        Pick one operation uniformly per material code. Returns row positions
+        into the column arrays, -1 where the code is -1 (no routing).
+        """
+        codes = np.asarray(codes)
+        valid = codes >= 0
+        safe = np.where(valid, codes, 0)
+        start = self.offsets[safe]
+        n_ops = self.offsets[safe + 1] - start
+        rows = start + (rng.random(len(codes)) * n_ops).astype(np.int64)
+        return np.where(valid, rows, -1)
+
+    def take(self, rows):
+        """Gather routing columns for row positions returned by sample_ops."""
+        return {c: arr[rows] for c, arr in self.columns.items()}
@@ -0,0 +1,132 @@
+# schema.py (Compact in-memory dtypes for the generated tables)
+
+import numpy as np
+
+# Column → compact dtype, shared by every table that has the column.
+# "category" applies to repeating ID/label text; integer targets are only
+# used when the values fit, and integer columns that had to become float
+# (missing values) are stored as float32 instead.
+SCHEMA = {
+    **dict.fromkeys([
+        "MaterialNumber", "MaterialName", "MaterialType", "ProductComplexity",
+        "ParentMaterial", "ComponentMaterial", "RawMaterial",
+        "ProductionOrderID", "PlantID", "WorkCenter", "WorkCenterID", "MachineClass", "OperatorID",
+        "DowntimeReason", "MaintenanceType", "DayOfWeek", "Shift",
+    ], "category"),
+    # 0/1 flags and calendar parts
+    **dict.fromkeys([
+        "Level", "MaintenanceFlag", "Hour", "Weekday", "Month", "IsWeekend",
+        "HasDowntime", "HasScrap", "IsBottleneck",
+    ], "int8"),
+    # Small counts and quantities
+    **dict.fromkeys(["OperationSeq", "Quantity", "PlannedQty", "ScrapQty", "Downtime_min"], "int16"),
+    # Minutes and lot sizes: unit-error glitches scale them by up to 60
+    **dict.fromkeys([
+        "SetupTime_min", "RunTime_min",
+        "SetupTime_Planned_min", "SetupTime_Actual_min", "RunTime_Planned_min", "RunTime_Actual_min",
+        "LotSize_Planned", "LotSize_Actual", "LotSizeVariance",
+        "TotalOperationTime", "PlannedCapacityTime", "ActualCapacityTime", "TheoreticalCapacity",
+        "ActualCapacityConsumption", "CapacityOverrun",
+    ], "int32"),
+}
+CATEGORY_MAX_SHARE = 0.5  # text columns with more distinct values than this stay strings
+
+
+def _compact_column(col, target):
+    if target == "category":
+        if col.dtype == object and col.nunique() <= CATEGORY_MAX_SHARE * len(col):
+            return col.astype("category")
+    elif col.dtype.kind in "iu":
+        info = np.iinfo(target)
+        if len(col) == 0 or (info.min <= col.min() and col.max() <= info.max):
+            return col.astype(target)
+    elif col.dtype == np.float64:
+        return col.astype(np.float32)
+    return col
+
+
+def apply_schema(df, schema=SCHEMA, dtypes=None):
+    """
+    Cast the SCHEMA columns of df to their compact dtypes in place; every
+    other float64 column becomes float32. Values that do not fit a target
+    leave that column as it is. Columns in `dtypes` (see stream_dtypes) are
+    cast to those instead, whatever this df's values. Returns df.
+    """
+    dtypes = dtypes or {}
+    for name in df.columns:
+        target = schema.get(name)
+        if name in dtypes:
+            df[name] = df[name].astype(dtypes[name])
+        elif target is not None:
+            df[name] = _compact_column(df[name], target)
+        elif df[name].dtype == np.float64:
+            df[name] = df[name].astype(np.float32)
+    return df
+
+
+def _fold_bound(bounds, name, lo, hi, is_float):
+    if name in bounds:
+        old_lo, old_hi, old_float = bounds[name]
+        lo, hi, is_float = min(lo, old_lo), max(hi, old_hi), is_float or old_float
+    bounds[name] = (lo, hi, is_float)
+
+
+def numeric_bounds(df, bounds=None):
+    """
+    Fold the numeric columns of df into `bounds` ({column: (min, max,
+    is_float)}, a new dict when None) and return it, so the value range of
+    a streamed table can be collected block by block.
+    """
+    bounds = {} if bounds is None else bounds
+    for name, col in df.items():
+        if col.dtype.kind not in "iuf" or len(col) == 0:
+            continue
+        # An all-missing block still marks the column as float
+        has_values = col.notna().any()
+        _fold_bound(bounds, name, col.min() if has_values else np.inf,
+                    col.max() if has_values else -np.inf, col.dtype.kind == "f")
+    return bounds
+
+
+def merge_bounds(*bounds):
+    """Combine the numeric_bounds of several streams (e.g. shards)."""
+    merged = {}
+    for b in bounds:
+        for name, bound in b.items():
+            _fold_bound(merged, name, *bound)
+    return merged
+
+
+def stream_dtypes(bounds, schema=SCHEMA):
+    """
+    One compact dtype per numeric column of a streamed table, decided from
+    the value range of all its blocks rather than block by block: float
+    columns become float32, integer ones their schema width when the whole
+    range fits it and int64 otherwise. Casting every block to these keeps
+    the blocks of one file on the same schema.
+    """
+    dtypes = {}
+    for name, (lo, hi, is_float) in bounds.items():
+        target = schema.get(name)
+        if is_float:
+            dtypes[name] = np.float32
+        elif target not in (None, "category") and np.iinfo(target).min <= lo and hi <= np.iinfo(target).max:
+            dtypes[name] = np.dtype(target)
+        else:
+            dtypes[name] = np.int64
+    return dtypes
+
+
+def memory_mb(df):
+    """Resident size of df in MB, strings included."""
+    return df.memory_usage(deep=True).sum() / 2**20
+
+
+def compact(df, name=None, dtypes=None):
+    """apply_schema, printing the memory before and after when a table name is given."""
+    before = memory_mb(df) if name else None
+    apply_schema(df, dtypes=dtypes)
+    if name:
+        after = memory_mb(df)
+        print(f"• {name}: {before:,.1f} MB → {after:,.1f} MB ({before / max(after, 1e-9):.1f}×)")
+    return df
@@ -12,6 +12,8 @@ import numpy as np
 from matplotlib.patches import Rectangle, FancyBboxPatch
 from matplotlib.patches import ConnectionPatch
 
+from dataset_cache import load_dataset, load_features
+
 # Set up the plotting style
 plt.style.use('seaborn-v0_8')
 sns.set_palette("husl")
@@ -19,12 +21,12 @@ sns.set_palette("husl")
 print("🎨 Creating Manufacturing System Network Visualization...")
 
 # Load key datasets
-material_master = pd.read_csv("out/material_master.csv")
-bom_table = pd.read_csv("out/bom_table.csv") 
-routing_table = pd.read_csv("out/routing_table.csv")
-production_orders = pd.read_csv("out/production_orders.csv")
-nal = pd.read_csv("out/NAL.csv")
-model_ready = pd.read_csv("out/model_ready.csv")
+material_master = load_dataset("material_master")
+bom_table = load_dataset("bom_table")
+routing_table = load_dataset("routing_table")
+production_orders = load_dataset("production_orders")
+nal = load_dataset("NAL")
+model_ready = load_features()
 
 # Create comprehensive system overview
 fig = plt.figure(figsize=(20, 14))
@@ -87,7 +89,7 @@ ax2.text(0, -1.5, f'Total: {len(material_master)} materials\nFG→SFG→RAW hier
 
 # 3. BOM Complexity Network
 ax3 = plt.subplot(2, 3, 3)
-bom_complexity = bom_table.groupby('ParentMaterial')['ComponentMaterial'].count()
+bom_complexity = bom_table.groupby('ParentMaterial', observed=True)['ComponentMaterial'].count()
 ax3.hist(bom_complexity.values, bins=15, alpha=0.7, color='#4ECDC4', edgecolor='black')
 ax3.set_title('BOM Complexity Distribution', fontsize=14, fontweight='bold')
 ax3.set_xlabel('Components per Product')
@@ -101,7 +103,7 @@ ax3.legend()
 
 # 4. Work Center Network
 ax4 = plt.subplot(2, 3, 4)
-wc_loads = routing_table.groupby('WorkCenter').agg({
+wc_loads = routing_table.groupby('WorkCenter', observed=True).agg({
     'MaterialNumber': 'nunique',
     'SetupTime_min': 'mean',
     'RunTime_min': 'mean'
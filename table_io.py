@@ -0,0 +1,181 @@
+# table_io.py
+
+import hashlib
+from pathlib import Path
+
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # Parquet is optional; CSV always works
+    pa = pq = None
+
+OUT_DIR = Path("out")
+FORMATS = ("csv", "parquet")
+ROW_GROUP_SIZE = 1_000_000
+COMPRESSION = "zstd"
+
+
+def add_format_argument(parser):
+    parser.add_argument("--format", choices=FORMATS, default="csv",
+                        help="output table format (parquet needs pyarrow)")
+
+
+def table_path(name, fmt="csv", out_dir=OUT_DIR):
+    return Path(out_dir) / f"{name}.{fmt}"
+
+
+def _require_pyarrow():
+    if pa is None:
+        raise ImportError("Parquet tables need pyarrow: pip install pyarrow")
+
+
+def _arrow_schema(df):
+    """
+    Repeating text columns become dictionary<int32, string> (categorical
+    IDs), mostly-unique ones (e.g. order numbers in the order table) plain
+    strings. Fixed from the first block, so every block of a streamed
+    table maps onto the same schema.
+    """
+    fields = []
+    for name, dtype in df.dtypes.items():
+        if isinstance(dtype, pd.CategoricalDtype) or (
+                dtype == object and df[name].nunique() <= 0.5 * len(df)):
+            fields.append(pa.field(name, pa.dictionary(pa.int32(), pa.string())))
+        elif dtype == object:
+            fields.append(pa.field(name, pa.string()))
+        else:
+            fields.append(pa.field(name, pa.from_numpy_dtype(dtype)))
+    return pa.schema(fields)
+
+
+def _arrow_table(df, schema):
+    """Convert column by column; dictionary-encoding in Arrow is far cheaper than via pandas."""
+    arrays = []
+    for field in schema:
+        col = df[field.name]
+        if pa.types.is_dictionary(field.type) and isinstance(col.dtype, pd.CategoricalDtype):
+            codes = col.cat.codes.to_numpy()
+            arrays.append(pa.DictionaryArray.from_arrays(
+                pa.array(codes, mask=codes < 0, type=pa.int32()),
+                pa.array(col.cat.categories.astype(str), type=pa.string()),
+            ))
+        elif pa.types.is_dictionary(field.type):
+            arrays.append(pa.array(col, type=pa.string(), from_pandas=True).dictionary_encode())
+        else:
+            arrays.append(pa.array(col, type=field.type, from_pandas=True))
+    return pa.Table.from_arrays(arrays, schema=schema)
+
+
+def write_table(df, name, fmt="csv", out_dir=OUT_DIR):
+    """Write one table as out/<name>.<fmt>; returns the path."""
+    path = table_path(name, fmt, out_dir)
+    with TableWriter(path, fmt) as writer:
+        writer.write(df)
+    return path
+
+
+def file_digest(path, block_size=1 << 20):
+    """SHA-256 of a file's content, read in blocks."""
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        while block := f.read(block_size):
+            h.update(block)
+    return h.hexdigest()
+
+
+def resolve_table(name, out_dir=OUT_DIR):
+    """Path to read for a table: the Parquet file unless the CSV is newer."""
+    csv, parquet = table_path(name, "csv", out_dir), table_path(name, "parquet", out_dir)
+    if pq is not None and parquet.exists():
+        if not csv.exists() or parquet.stat().st_mtime >= csv.stat().st_mtime:
+            return parquet
+    return csv
+
+
+def read_table(name, parse_dates=None, columns=None, out_dir=OUT_DIR):
+    """
+    Load out/<name> from Parquet when available (typed, no date parsing),
+    otherwise from CSV with the given date columns parsed.
+    """
+    path = resolve_table(name, out_dir)
+    if path.suffix == ".parquet":
+        return pd.read_parquet(path, columns=columns)
+    return pd.read_csv(path, parse_dates=parse_dates, usecols=columns)
+
+
+def read_table_at(path, **kwargs):
+    """read_table for the table a file path names, e.g. "out/bom_table.csv"."""
+    path = Path(path)
+    return read_table(path.stem, out_dir=path.parent, **kwargs)
+
+
+def iter_table(name, chunk_size, parse_dates=None, dtype=None, out_dir=OUT_DIR):
+    """
+    Stream out/<name> as DataFrames of up to chunk_size rows (Parquet record
+    batches or CSV chunks). `dtype` pins CSV column types, which would
+    otherwise be inferred per chunk.
+    """
+    path = resolve_table(name, out_dir)
+    if path.suffix == ".parquet":
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=chunk_size):
+            yield batch.to_pandas()
+    else:
+        yield from pd.read_csv(path, parse_dates=parse_dates, dtype=dtype, chunksize=chunk_size)
+
+
+class TableWriter:
+    """
+    Append DataFrame blocks to a single CSV or Parquet file. Parquet blocks
+    are buffered as Arrow tables until a full row group is available. With
+    append=True an existing CSV is extended instead of replaced.
+    """
+
+    def __init__(self, path, fmt="csv", row_group_size=ROW_GROUP_SIZE, append=False):
+        if fmt not in FORMATS:
+            raise ValueError(f"Unknown table format {fmt!r}; expected one of {FORMATS}")
+        if fmt == "parquet":
+            _require_pyarrow()
+            if append:
+                raise ValueError("Parquet files cannot be appended to; use CSV")
+        self.path = Path(path)
+        self.fmt = fmt
+        self.row_group_size = row_group_size
+        self.rows = 0
+        self._append = append and self.path.exists()
+        self._parquet = None
+        self._pending = []
+        self._pending_rows = 0
+
+    def write(self, df):
+        if self.fmt == "csv":
+            started = self.rows or self._append
+            df.to_csv(self.path, mode="a" if started else "w", header=not started, index=False)
+        else:
+            if self._parquet is None:
+                schema = _arrow_schema(df)
+                self._parquet = pq.ParquetWriter(self.path, schema, compression=COMPRESSION)
+            self._pending.append(_arrow_table(df, self._parquet.schema))
+            self._pending_rows += len(df)
+            if self._pending_rows >= self.row_group_size:
+                self._flush()
+        self.rows += len(df)
+
+    def _flush(self):
+        if self._pending:
+            table = pa.concat_tables(self._pending)
+            self._parquet.write_table(table, row_group_size=self.row_group_size)
+            self._pending, self._pending_rows = [], 0
+
+    def close(self):
+        if self._parquet is not None:
+            self._flush()
+            self._parquet.close()
+            self._parquet = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,190 @@
+# test_invariants.py (Reference checks for the vectorized stages)
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from bom_index import BomIndex
+from bom_validation import BomCycleError, low_level_codes
+from dirty_data import inject
+from erp_material_bom_generator import generate_bom, generate_material_master
+import model_ready
+from model_ready import append_npy
+from nal import add_event_ids, event_id_source, new_order_state, sequence_orders
+
+
+def reference_sequence(order_ids, timestamps, durations_min, buffer_min, last):
+    """The per-event loop sequence_orders replaced; `last` maps order → (timestamp, duration)."""
+    out = timestamps.copy()
+    for i, order_id in enumerate(order_ids):
+        if order_id in last:
+            prev_ts, prev_dur = last[order_id]
+            earliest = prev_ts + np.timedelta64(int(prev_dur + buffer_min[i]), "m")
+            if out[i] <= earliest:
+                out[i] = earliest
+        last[order_id] = (out[i], durations_min[i])
+    return out
+
+
+def test_sequence_orders_matches_loop_across_chunks():
+    rng = np.random.default_rng(7)
+    n_orders = 40
+    state, last = new_order_state(n_orders), {}
+    for _ in range(4):
+        n = 600
+        codes = rng.integers(0, n_orders, n)
+        minutes = rng.integers(0, 30 * 24 * 60, n).astype("timedelta64[m]")
+        timestamps = (np.datetime64("2024-01-01") + minutes).astype("datetime64[ns]")
+        durations = rng.uniform(50, 900, n)
+        buffers = rng.integers(0, 30, n)
+        expected = reference_sequence(codes, timestamps, durations, buffers, last)
+        np.testing.assert_array_equal(sequence_orders(codes, timestamps, durations, buffers, state), expected)
+
+
+def random_dag(rng, n_materials=60, n_edges=150):
+    """BOM rows of a random DAG, with material names shuffled against the topological order."""
+    names = rng.permutation([f"MAT{i:03}" for i in range(n_materials)])
+    parent = rng.integers(0, n_materials - 1, n_edges)
+    child = parent + 1 + (rng.random(n_edges) * (n_materials - 1 - parent)).astype(int)
+    return pd.DataFrame({"ParentMaterial": names[parent], "ComponentMaterial": names[child],
+                         "Quantity": rng.integers(1, 5, n_edges)})
+
+
+def longest_path_levels(bom):
+    """Brute force: relax level[child] >= level[parent] + 1 until nothing changes."""
+    level = dict.fromkeys(pd.concat([bom.ParentMaterial, bom.ComponentMaterial]), 0)
+    changed = True
+    while changed:
+        changed = False
+        for parent, child in zip(bom.ParentMaterial, bom.ComponentMaterial):
+            if level[child] < level[parent] + 1:
+                level[child], changed = level[parent] + 1, True
+    return level
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_low_level_codes_match_longest_path(seed):
+    bom = random_dag(np.random.default_rng(seed))
+    index = BomIndex(bom)
+    levels = longest_path_levels(bom)
+    assert dict(zip(index.materials, low_level_codes(index).tolist())) == levels
+
+
+
+@pytest.mark.parametrize("share", [0.0, 0.25, 0.5, 0.75])
+def test_generated_bom_reuse_tracks_share(share):
+    mm = generate_material_master(n_fg=30, n_sfg=5_000, n_raw=300)
+    bom = generate_bom(mm, levels=5, share=share)
+    components = bom.ComponentMaterial.astype(str)
+    sfg_rows = components[components.str.startswith("SFG")]
+    # Share of sub-assembly rows that point at an SFG another row already uses
+    assert 1 - sfg_rows.nunique() / len(sfg_rows) == pytest.approx(share, abs=0.05)
+    # Every SFG in the BOM has a parent, so only FGs are top-level
+    parents = set(bom.ParentMaterial.astype(str))
+    assert {m for m in parents if m.startswith("SFG")} <= set(sfg_rows)
+
+def reaches(bom, start, target):
+    """Whether target is in the BOM subtree of start."""
+    seen, stack = {start}, [start]
+    while stack:
+        node = stack.pop()
+        for child in bom.ComponentMaterial[bom.ParentMaterial == node]:
+            if child not in seen:
+                seen.add(child)
+                stack.append(child)
+    return target in seen
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_cycle_path_is_a_cycle(seed):
+    rng = np.random.default_rng(seed)
+    bom = random_dag(rng)
+    # Close a loop from a deepest material back to a top-level material above it
+    levels = longest_path_levels(bom)
+    deepest = max(levels, key=levels.get)
+    root = next(m for m in bom.ParentMaterial if levels[m] == 0 and reaches(bom, m, deepest))
+    bom = pd.concat([bom, pd.DataFrame({"ParentMaterial": [deepest], "ComponentMaterial": [root],
+                                        "Quantity": [1]})], ignore_index=True)
+    with pytest.raises(BomCycleError) as err:
+        low_level_codes(BomIndex(bom))
+    path = err.value.path
+    edges = set(zip(bom.ParentMaterial, bom.ComponentMaterial))
+    assert path[0] == path[-1] and len(path) > 1
+    assert all((a, b) in edges for a, b in zip(path, path[1:]))
+
+
+@pytest.mark.parametrize("shape", [(4,), (3, 4)])
+def test_append_npy_matches_full_save(tmp_path, shape):
+    rng = np.random.default_rng(0)
+    # Row counts grow by several digits, so the header is rewritten in place more than once
+    blocks = [rng.random((n, *shape[1:])).astype(np.float32) for n in (shape[0], 7, 1_000, 200_000)]
+    path = tmp_path / "appended.npy"
+    for block in blocks:
+        append_npy(path, block)
+    full = np.concatenate(blocks)
+    np.testing.assert_array_equal(np.load(path, mmap_mode="r"), full)
+    np.save(tmp_path / "full.npy", full)
+    assert path.read_bytes() == (tmp_path / "full.npy").read_bytes()
+
+
+def synthetic_nal(n, rng):
+    """n NAL events on three orders; every other one from row 10 on is a PM event."""
+    pm = (np.arange(n) >= 10) & (np.arange(n) % 2 == 0)
+    return pd.DataFrame({
+        "EventID": np.arange(n),
+        "RecordDateTime": pd.date_range("2025-01-06", periods=n, freq="37min"),
+        "ProductionOrderID": rng.choice(["PO100000", "PO100001", "PO100002"], n),
+        "PlantID": rng.choice(["PLT1", "PLT2"], n),
+        "WorkCenterID": rng.choice(["WC01", "WC02"], n),
+        "MachineClass": rng.choice(["CNC", "MILL"], n),
+        "OperatorID": rng.choice(["OP001", "OP002"], n),
+        "MaterialNumber": "FG0001",
+        "MaterialName": "Bearing",
+        "ProductComplexity": rng.choice(["LOW", "HIGH"], n),
+        "OperationSeq": rng.integers(1, 5, n),
+        "SetupTime_Planned_min": rng.integers(10, 60, n),
+        "RunTime_Planned_min": rng.integers(100, 500, n),
+        "SetupTime_Actual_min": rng.integers(10, 60, n),
+        "RunTime_Actual_min": rng.integers(100, 500, n),
+        "LotSize_Planned": rng.integers(50, 500, n),
+        "LotSize_Actual": rng.integers(50, 500, n),
+        "ScrapQty": rng.integers(0, 5, n),
+        "YieldRate_pct": rng.uniform(90, 100, n),
+        "Downtime_min": np.where(pm, 60, rng.integers(0, 20, n)),
+        "DowntimeReason": rng.choice(["MECH", None], n),
+        "MaintenanceFlag": pm.astype(int),
+        "MaintenanceType": np.where(pm, "PLANNED", None),
+    })
+
+
+def test_incremental_append_after_all_null_text_column(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    out = tmp_path / "out"
+    out.mkdir()
+    pd.DataFrame({
+        "ProductionOrderID": ["PO100000", "PO100001", "PO100002"],
+        "OrderDate": ["2025-01-01", "2025-01-02", "2025-01-03"],
+        "PlannedQty": [100, 200, 300],
+    }).to_csv(out / "production_orders.csv", index=False)
+    nal = synthetic_nal(60, np.random.default_rng(3))
+    # The first batch has no PM events, so MaintenanceType is empty throughout
+    nal.iloc[:10].to_csv(out / "NAL.csv", index=False)
+    appended, state = model_ready.update_incremental()
+    assert appended == 10 and "MaintenanceType" not in state["float_columns"]
+
+    nal.iloc[10:].to_csv(out / "NAL.csv", mode="a", header=False, index=False)
+    appended, state = model_ready.update_incremental()
+    assert appended == 50 and state["rows"] == 60
+    store = pd.read_csv(out / "model_ready.csv")
+    assert len(store) == 60 and (store.MaintenanceType == "PLANNED").sum() == 25
+
+
+def test_duplicate_rows_get_fresh_event_ids():
+    new_ids = event_id_source(shard=1, n_shards=3)
+    df = add_event_ids(pd.DataFrame({"Downtime_min": np.arange(1_000)}), new_ids)
+    spec = [{"kind": "duplicate_rows", "rate": 0.1}, {"kind": "duplicate_rows", "rate": 0.1}]
+    dirty, labels = inject(df, spec, np.random.default_rng(5), new_ids=new_ids)
+    assert len(dirty) > len(df) and dirty.EventID.is_unique
+    assert (dirty.EventID % 3 == 1).all()
+    # Labels point at the copies, not at the rows they were copied from
+    assert set(labels.EventID) == set(dirty.EventID[len(df):])
@@ -0,0 +1,60 @@
+# where_used.py (Reverse BOM lookups and production-order impact of short materials)
+
+import argparse
+
+import pandas as pd
+
+from bom_index import BomIndex
+from table_io import read_table
+
+
+def where_used(bom, material_numbers):
+    """
+    Every SFG/FG containing each of the materials, directly or through
+    sub-assemblies, with the cumulative quantity needed per unit of it.
+    `bom` is a BomIndex, or a BOM DataFrame to build one from; materials not
+    in the BOM are left out. One reverse walk serves the whole list.
+    """
+    index = bom if isinstance(bom, BomIndex) else BomIndex(bom)
+    materials = pd.Index([material_numbers] if isinstance(material_numbers, str) else material_numbers)
+    codes = index.codes(materials)
+    known = materials[codes >= 0]
+    source, used_in, qty = index.ancestors(codes[codes >= 0])
+    return pd.DataFrame({
+        "Component": known[source].to_numpy(),
+        "UsedIn": index.materials[used_in].to_numpy(),
+        "QtyPerUnit": qty,
+    })
+
+
+def order_impact(bom, material_numbers, orders, since=None):
+    """
+    Production orders hit by a shortage of any of the materials: one row per
+    (short material, order) with the quantity of it the order needs.
+    `since` keeps only orders dated on or after that day.
+    """
+    used = where_used(bom, material_numbers)
+    if since is not None:
+        orders = orders[orders["OrderDate"] >= pd.Timestamp(since)]
+    hit = orders.merge(used, left_on=orders["MaterialNumber"].astype(str), right_on="UsedIn")
+    hit["RequiredQty"] = hit["PlannedQty"] * hit["QtyPerUnit"]
+    return hit[["Component", "ProductionOrderID", "MaterialNumber", "OrderDate", "PlannedQty", "RequiredQty"]]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Where-used and order impact for short materials.")
+    parser.add_argument("materials", nargs="+", help="material numbers, e.g. RAW0001 SFG0002")
+    parser.add_argument("--since", help="only count orders dated on or after this day (YYYY-MM-DD)")
+    args = parser.parse_args()
+
+    bom_index = BomIndex.from_table()
+    orders = read_table("production_orders", parse_dates=["OrderDate"])
+    used = where_used(bom_index, args.materials)
+    impact = order_impact(bom_index, args.materials, orders, args.since)
+    summary = pd.DataFrame({
+        "Materials": used.groupby("Component").size(),
+        "FinishedGoods": used[used.UsedIn.str.startswith("FG")].groupby("Component").size(),
+        "Orders": impact.groupby("Component").size(),
+        "RequiredQty": impact.groupby("Component")["RequiredQty"].sum(),
+    }).reindex(args.materials).fillna(0).astype(int)
+    print(summary)